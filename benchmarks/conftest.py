@@ -0,0 +1,10 @@
+import pytest
+
+from mocket import Mocket
+
+
+@pytest.fixture
+def mocket():
+    Mocket.enable()
+    yield Mocket
+    Mocket.disable()
@@ -0,0 +1,43 @@
+import pytest
+
+from mocket import Mocket
+from mocket.mockhttp import Entry, Response
+
+
+def test_enable_disable(benchmark):
+    def enable_disable():
+        Mocket.enable()
+        Mocket.disable()
+
+    benchmark(enable_disable)
+
+
+@pytest.mark.parametrize("entries", [10, 100, 10_000])
+def test_get_entry(benchmark, mocket, entries):
+    for i in range(entries):
+        Entry.single_register(Entry.GET, f"http://testme.org/{i}", body=str(i))
+    request = f"GET /{entries - 1} HTTP/1.1\r\nHost: testme.org\r\n\r\n".encode()
+
+    entry = benchmark(Mocket.get_entry, "testme.org", 80, request)
+
+    assert entry.path == f"/{entries - 1}"
+
+
+@pytest.mark.parametrize("size", [0, 1024, 1024 * 1024])
+def test_http_response(benchmark, size):
+    body = b"x" * size
+
+    response = benchmark(Response, body, headers={"Content-Type": "text/plain"})
+
+    assert response.body == body
+
+
+def test_scope(benchmark, mocket):
+    for i in range(1000):
+        Entry.single_register(Entry.GET, f"http://testme.org/{i}", body=str(i))
+
+    def scope():
+        with Mocket.scope():
+            pass
+
+    benchmark(scope)
@@ -0,0 +1,41 @@
+import pytest
+
+from mocket.recording import RECORD_STORAGES
+
+ADDRESS = ("testme.org", 80)
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\nfoo"
+
+
+def put_records(storage, records):
+    for i in range(records):
+        storage.put_record(
+            address=ADDRESS,
+            request=f"GET /{i} HTTP/1.1\r\nHost: testme.org\r\n\r\n".encode(),
+            response=RESPONSE,
+        )
+    storage.flush()
+
+
+@pytest.mark.parametrize("recording_format", RECORD_STORAGES)
+def test_save(benchmark, tmp_path, recording_format):
+    storage_cls = RECORD_STORAGES[recording_format]
+
+    def save():
+        for path in tmp_path.iterdir():
+            path.unlink()
+        put_records(storage_cls(directory=tmp_path, namespace="ns"), 1000)
+
+    benchmark.pedantic(save, rounds=5)
+
+
+@pytest.mark.parametrize("recording_format", RECORD_STORAGES)
+def test_load(benchmark, tmp_path, recording_format):
+    storage_cls = RECORD_STORAGES[recording_format]
+    put_records(storage_cls(directory=tmp_path, namespace="ns"), 1000)
+    request = b"GET /999 HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+
+    def load():
+        storage = storage_cls(directory=tmp_path, namespace="ns")
+        return storage.get_record(address=ADDRESS, request=request)
+
+    assert benchmark(load).response == RESPONSE
@@ -0,0 +1,24 @@
+import pytest
+
+from mocket import Mocket
+from mocket.mockredis import Entry, Redisizer
+
+
+@pytest.mark.parametrize("entries", [10, 100, 1000])
+def test_can_handle(benchmark, mocket, entries):
+    for i in range(entries):
+        Entry.register_response(f"GET key{i}", str(i))
+    data = b"\r\n".join(Redisizer.tokens(["GET", f"key{entries - 1}"])) + b"\r\n"
+
+    entry = benchmark(Mocket.get_entry, "localhost", 6379, data)
+
+    assert entry.command == Redisizer.tokens(["GET", f"key{entries - 1}"])
+
+
+@pytest.mark.parametrize("size", [1000, 100000])
+def test_encode(benchmark, size):
+    data = [f"value{i}" for i in range(size)]
+
+    encoded = benchmark(Redisizer.encode, data)
+
+    assert encoded.startswith(b"*%d\r\n$6\r\nvalue0\r\n" % size)
@@ -0,0 +1,35 @@
+import socket
+
+import pytest
+
+from mocket import Mocket, MocketEntry
+
+ADDRESS = ("testme.org", 80)
+
+
+@pytest.mark.parametrize(
+    "size",
+    [1024, 1024 * 1024, 100 * 1024 * 1024],
+    ids=["1KB", "1MB", "100MB"],
+)
+def test_sendall_recv(benchmark, mocket, size):
+    payload = b"x" * size
+    Mocket.register(MocketEntry(ADDRESS, [payload]))
+
+    def sendall_recv():
+        with socket.socket() as sock:
+            sock.connect(ADDRESS)
+            sock.sendall(payload)
+            received = 0
+            while received < size:
+                received += len(sock.recv(65536))
+        Mocket._requests = []
+        return received
+
+    rounds = 3 if size > 1024 * 1024 else None
+    if rounds:
+        received = benchmark.pedantic(sendall_recv, rounds=rounds)
+    else:
+        received = benchmark(sendall_recv)
+
+    assert received == size
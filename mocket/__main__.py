@@ -0,0 +1,57 @@
+"""Command line utilities for Mocket recordings.
+
+Usage::
+
+    $ python -m mocket compact <truesocket_recording_dir> [<namespace> ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Sequence
+
+from mocket.recording import MocketJsonLinesRecordStorage
+
+
+def compact(directory: Path, namespaces: Sequence[str] = ()) -> list[str]:
+    """Merge JSON Lines recordings back into the JSON format.
+
+    Args:
+        directory: Recording directory
+        namespaces: Namespaces to compact, all the journals found by default
+
+    Returns:
+        List of compacted namespaces
+    """
+    namespaces = namespaces or sorted(path.stem for path in directory.glob("*.jsonl"))
+    for namespace in namespaces:
+        MocketJsonLinesRecordStorage(directory=directory, namespace=namespace).compact()
+    return list(namespaces)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the command line interface.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(prog="python -m mocket")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="merge JSON Lines recordings into the JSON format"
+    )
+    compact_parser.add_argument("directory", type=Path)
+    compact_parser.add_argument("namespaces", nargs="*")
+
+    args = parser.parse_args(argv)
+    if not args.directory.is_dir():
+        parser.error(f"Not a directory: {args.directory}")
+
+    for namespace in compact(args.directory, args.namespaces):
+        print(f"compacted {namespace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import codecs
+import hashlib
 import os
 import shlex
 from typing import Final
@@ -9,6 +10,12 @@ import puremagic
 
 ENCODING: Final[str] = os.getenv("MOCKET_ENCODING", "utf-8")
 
+# bytes sniffed at the start and at the end of a body, MIME signatures
+# are looked for within them
+MAGIC_SAMPLE_SIZE: Final[int] = 64 * 1024
+MAGIC_CACHE_SIZE: Final[int] = 256
+_magic_cache: dict[bytes, str] = {}
+
 
 def encode_to_bytes(s: str | bytes, encoding: str = ENCODING) -> bytes:
     """Encode a string or bytes to bytes.
@@ -56,14 +63,33 @@ def shsplit(s: str | bytes) -> list[str]:
 def do_the_magic(body: bytes) -> str:
     """Detect MIME type of binary data using puremagic.
 
+    Only the start and the end of the body are sniffed, results are
+    memoized by their digest.
+
     Args:
         body: Binary data to analyze
 
     Returns:
         MIME type string
+
+    >>> do_the_magic(b"")
+    'application/octet-stream'
     """
+    if len(body) > 2 * MAGIC_SAMPLE_SIZE:
+        body = body[:MAGIC_SAMPLE_SIZE] + body[-MAGIC_SAMPLE_SIZE:]
+
+    key = hashlib.blake2b(body, digest_size=16).digest()
+    mime_type = _magic_cache.get(key)
+    if mime_type is not None:
+        return mime_type
+
     try:
         magic = puremagic.magic_string(body)
-    except puremagic.PureError:
+    except (puremagic.PureError, ValueError):
         magic = []
-    return magic[0].mime_type if len(magic) else "application/octet-stream"
+    mime_type = magic[0].mime_type if len(magic) else "application/octet-stream"
+
+    if len(_magic_cache) >= MAGIC_CACHE_SIZE:
+        del _magic_cache[next(iter(_magic_cache))]
+    _magic_cache[key] = mime_type
+    return mime_type
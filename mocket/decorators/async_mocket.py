@@ -5,6 +5,8 @@ from __future__ import annotations
 from typing import Any, Callable
 
 from mocket.decorators.mocketizer import Mocketizer
+from mocket.journal import RequestJournal
+from mocket.types import RequestCanonicalizer
 from mocket.utils import get_mocketize
 
 
@@ -13,6 +15,11 @@ async def wrapper(
     truesocket_recording_dir: str | None = None,
     strict_mode: bool = False,
     strict_mode_allowed: list | None = None,
+    recording_format: str | None = None,
+    request_canonicalizer: RequestCanonicalizer | None = None,
+    asyncio_transport: bool = False,
+    isolated: bool = False,
+    request_journal: RequestJournal | None = None,
     *args: Any,
     **kwargs: Any,
 ) -> Any:
@@ -23,6 +30,14 @@ async def wrapper(
         truesocket_recording_dir: Directory for recording true socket calls
         strict_mode: Enable STRICT mode to forbid real socket calls
         strict_mode_allowed: List of allowed hosts in STRICT mode
+        recording_format: Format of the recordings, "json", "jsonl" or "binary"
+        request_canonicalizer: Function rewriting recorded requests before
+            hashing them
+        asyncio_transport: Serve asyncio connections to mocked addresses
+            through MocketTransport, without sockets
+        isolated: Give the test its own entries, requests and mode
+        request_journal: How to keep the collected requests, all of them
+            by default
         *args: Test arguments
         **kwargs: Test keyword arguments
 
@@ -30,7 +45,16 @@ async def wrapper(
         Result of the test function
     """
     async with Mocketizer.factory(
-        test, truesocket_recording_dir, strict_mode, strict_mode_allowed, args
+        test,
+        truesocket_recording_dir,
+        strict_mode,
+        strict_mode_allowed,
+        args,
+        recording_format=recording_format,
+        request_canonicalizer=request_canonicalizer,
+        asyncio_transport=asyncio_transport,
+        isolated=isolated,
+        request_journal=request_journal,
     ):
         return await test(*args, **kwargs)
 
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from contextlib import AbstractContextManager
 from typing import Any, Callable
 
+from mocket.journal import RequestJournal
 from mocket.mocket import Mocket
 from mocket.mode import MocketMode
+from mocket.state import MocketState, isolated_state
+from mocket.types import RequestCanonicalizer
 from mocket.utils import get_mocketize
 
 
@@ -19,6 +23,11 @@ class Mocketizer:
         truesocket_recording_dir: str | None = None,
         strict_mode: bool = False,
         strict_mode_allowed: list | None = None,
+        recording_format: str | None = None,
+        request_canonicalizer: RequestCanonicalizer | None = None,
+        asyncio_transport: bool = False,
+        isolated: bool = False,
+        request_journal: RequestJournal | None = None,
     ) -> None:
         """Initialize the Mocketizer.
 
@@ -28,26 +37,60 @@ class Mocketizer:
             truesocket_recording_dir: Directory for recording true socket calls
             strict_mode: Enable STRICT mode to forbid real socket calls
             strict_mode_allowed: List of allowed hosts in STRICT mode
+            recording_format: Format of the recordings, "json", "jsonl" or "binary"
+            request_canonicalizer: Function rewriting recorded requests before
+                hashing them
+            asyncio_transport: Serve asyncio connections through MocketTransport
+            isolated: Give the current thread or asyncio task its own entries,
+                requests and mode, so that Mocketizers can run in parallel
+            request_journal: How to keep the collected requests
         """
         self.instance = instance
         self.truesocket_recording_dir = truesocket_recording_dir
+        self.recording_format = recording_format
+        self.request_canonicalizer = request_canonicalizer
+        self.asyncio_transport = asyncio_transport
+        self.request_journal = request_journal
         self.namespace = namespace or str(id(self))
-        MocketMode.STRICT = strict_mode
-        if strict_mode:
-            MocketMode.STRICT_ALLOWED = strict_mode_allowed or []
-        elif strict_mode_allowed:
+        if not strict_mode and strict_mode_allowed:
             raise ValueError(
                 "Allowed locations are only accepted when STRICT mode is active."
             )
+        self.strict_mode = strict_mode
+        self.strict_mode_allowed = strict_mode_allowed
+        self.isolated = isolated
+        self._isolation: AbstractContextManager[MocketState] | None = None
+        if not isolated:
+            self._set_mode()
+
+    def _set_mode(self) -> None:
+        """Set the mode of the current state."""
+        MocketMode.STRICT = self.strict_mode
+        if self.strict_mode:
+            MocketMode.STRICT_ALLOWED = self.strict_mode_allowed or []
 
     def enter(self) -> None:
         """Enter the Mocketizer context (enable Mocket)."""
+        if self.isolated:
+            # a new one each time, for the Mocketizer to be entered again
+            self._isolation = isolated_state()
+            self._isolation.__enter__()
+            self._set_mode()
         Mocket.enable(
             namespace=self.namespace,
             truesocket_recording_dir=self.truesocket_recording_dir,
+            recording_format=self.recording_format,
+            request_canonicalizer=self.request_canonicalizer,
+            asyncio_transport=self.asyncio_transport,
+            request_journal=self.request_journal,
         )
         if self.instance:
-            self.check_and_call("mocketize_setup")
+            try:
+                self.check_and_call("mocketize_setup")
+            except BaseException:
+                # __exit__ is not called when __enter__ fails
+                self._disable()
+                raise
 
     def __enter__(self) -> Mocketizer:
         """Enter context manager.
@@ -63,7 +106,26 @@ class Mocketizer:
         if self.instance:
             self.check_and_call("mocketize_teardown")
 
+        self._disable()
+
+    def _disable(self) -> None:
+        """Disable Mocket, leaving the isolated state if any."""
         Mocket.disable()
+        if self._isolation is not None:
+            self._isolation.__exit__(None, None, None)
+            self._isolation = None
+
+    def scope(self) -> AbstractContextManager[None]:
+        """Get a context manager (or decorator) for a single test.
+
+        Meant for Mocketizers kept entered for a whole session or class:
+        what each test registers, requests and serves is undone when it
+        ends, without patching modules or loading recordings again.
+
+        Returns:
+            Context manager from `Mocket.scope`
+        """
+        return Mocket.scope()
 
     def __exit__(self, type: Any, value: Any, tb: Any) -> None:
         """Exit context manager.
@@ -110,6 +172,11 @@ class Mocketizer:
         strict_mode: bool,
         strict_mode_allowed: list | None,
         args: tuple,
+        recording_format: str | None = None,
+        request_canonicalizer: RequestCanonicalizer | None = None,
+        asyncio_transport: bool = False,
+        isolated: bool = False,
+        request_journal: RequestJournal | None = None,
     ) -> Mocketizer:
         """Create a Mocketizer instance for a test function.
 
@@ -119,6 +186,11 @@ class Mocketizer:
             strict_mode: Enable STRICT mode
             strict_mode_allowed: Allowed hosts in STRICT mode
             args: Positional arguments to test
+            recording_format: Format of the recordings
+            request_canonicalizer: Function rewriting recorded requests
+            asyncio_transport: Serve asyncio connections through MocketTransport
+            isolated: Give the test its own entries, requests and mode
+            request_journal: How to keep the collected requests
 
         Returns:
             Configured Mocketizer instance
@@ -140,6 +212,11 @@ class Mocketizer:
             truesocket_recording_dir=truesocket_recording_dir,
             strict_mode=strict_mode,
             strict_mode_allowed=strict_mode_allowed,
+            recording_format=recording_format,
+            request_canonicalizer=request_canonicalizer,
+            asyncio_transport=asyncio_transport,
+            isolated=isolated,
+            request_journal=request_journal,
         )
 
 
@@ -148,6 +225,11 @@ def wrapper(
     truesocket_recording_dir: str | None = None,
     strict_mode: bool = False,
     strict_mode_allowed: list | None = None,
+    recording_format: str | None = None,
+    request_canonicalizer: RequestCanonicalizer | None = None,
+    asyncio_transport: bool = False,
+    isolated: bool = False,
+    request_journal: RequestJournal | None = None,
     *args: Any,
     **kwargs: Any,
 ) -> Any:
@@ -158,6 +240,11 @@ def wrapper(
         truesocket_recording_dir: Recording directory
         strict_mode: Enable STRICT mode
         strict_mode_allowed: Allowed hosts in STRICT mode
+        recording_format: Format of the recordings
+        request_canonicalizer: Function rewriting recorded requests
+        asyncio_transport: Serve asyncio connections through MocketTransport
+        isolated: Give the test its own entries, requests and mode
+        request_journal: How to keep the collected requests
         *args: Test arguments
         **kwargs: Test keyword arguments
 
@@ -165,7 +252,16 @@ def wrapper(
         Result of the test function
     """
     with Mocketizer.factory(
-        test, truesocket_recording_dir, strict_mode, strict_mode_allowed, args
+        test,
+        truesocket_recording_dir,
+        strict_mode,
+        strict_mode_allowed,
+        args,
+        recording_format=recording_format,
+        request_canonicalizer=request_canonicalizer,
+        asyncio_transport=asyncio_transport,
+        isolated=isolated,
+        request_journal=request_journal,
     ):
         return test(*args, **kwargs)
 
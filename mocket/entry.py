@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import collections.abc
-from typing import Any
+from typing import Any, Hashable
 
 from mocket.compat import encode_to_bytes
 from mocket.mocket import Mocket
@@ -44,7 +44,10 @@ class MocketEntry:
         else:
             self.responses = []
             for r in responses:
-                if not isinstance(r, BaseException) and not getattr(r, "data", False):
+                # looking up the class first, for not rendering (or
+                # consuming) responses whose data is a property
+                is_response = hasattr(type(r), "data") or hasattr(r, "data")
+                if not isinstance(r, BaseException) and not is_response:
                     if isinstance(r, str):
                         r = encode_to_bytes(r)
                     r = self.response_cls(r)
@@ -54,6 +57,31 @@ class MocketEntry:
         """Return a string representation of the entry."""
         return f"{self.__class__.__name__}(location={self.location})"
 
+    @property
+    def index_key(self) -> Hashable | None:
+        """Get the key used for indexing the entry.
+
+        Entries sharing the same class are only considered for requests
+        whose `request_index_key` matches their `index_key`, None means
+        the entry is considered for any request.
+
+        Returns:
+            Hashable key or None
+        """
+        return None
+
+    @classmethod
+    def request_index_key(cls, data: bytes) -> Hashable | None:
+        """Get the index key of the given request data.
+
+        Args:
+            data: Request data
+
+        Returns:
+            Hashable key or None if the request can't be classified
+        """
+        return None
+
     @staticmethod
     def can_handle(data: bytes) -> bool:
         """Check if this entry can handle the given request data.
@@ -73,24 +101,62 @@ class MocketEntry:
             data: Request data to collect
         """
         req = self.request_cls(data)
-        Mocket.collect(req)
+        Mocket.collect(req, data)
 
-    def get_response(self) -> bytes:
-        """Get the next response to send.
+    def _next_response(self) -> Any:
+        """Get the next response, moving to the following one.
 
         Returns:
-            Response bytes to send to the client
+            Response object
 
         Raises:
             BaseException: If a response is an exception, it will be raised
         """
+        if Mocket._scoped_entries:
+            # rewound to where it was when the innermost scope is over
+            Mocket._scoped_entries[-1].setdefault(
+                id(self), (self, self.response_index, self._served)
+            )
+
         response = self.responses[self.response_index]
         if self.response_index < len(self.responses) - 1:
             self.response_index += 1
-
         self._served = True
 
         if isinstance(response, BaseException):
             raise response
 
-        return response.data
+        return response
+
+    def get_response(self) -> bytes:
+        """Get the next response to send.
+
+        Returns:
+            Response bytes to send to the client
+
+        Raises:
+            BaseException: If a response is an exception, it will be raised
+        """
+        return self._next_response().data
+
+    def get_response_segments(self) -> tuple[bytes, ...]:
+        """Get the next response to send, split in segments.
+
+        Responses exposing `segments` (e.g. headers and body) are sent
+        without joining them.
+
+        Returns:
+            Response bytes to send to the client, in order
+
+        Raises:
+            BaseException: If a response is an exception, it will be raised
+        """
+        if type(self).get_response is not MocketEntry.get_response:
+            # honour the subclasses customizing the response
+            return (self.get_response(),)
+
+        response = self._next_response()
+        segments = getattr(response, "segments", None)
+        if segments is None:
+            return (response.data,)
+        return segments  # type: ignore[no-any-return]
@@ -0,0 +1,97 @@
+"""Framing of responses read from real sockets."""
+
+from __future__ import annotations
+
+
+def _chunked_body_is_complete(body: bytes, start: int) -> bool | None:
+    r"""Check if a chunked body contains its last chunk.
+
+    Args:
+        body: Response data
+        start: Offset of the first chunk in body
+
+    Returns:
+        True if complete, False if incomplete, None if malformed
+
+    >>> _chunked_body_is_complete(b'4\r\nWiki\r\n0\r\n\r\n', 0)
+    True
+    >>> _chunked_body_is_complete(b'4\r\nWiki\r\n', 0)
+    False
+    """
+    # a complete chunked body always ends with an empty line
+    if not body.endswith(b"\r\n\r\n"):
+        return False
+
+    position = start
+    while True:
+        line_end = body.find(b"\r\n", position)
+        if line_end == -1:
+            return False
+        try:
+            size = int(body[position:line_end].split(b";", 1)[0], 16)
+        except ValueError:
+            return None
+        if size == 0:
+            # last chunk, followed by optional trailers and an empty line
+            return body.find(b"\r\n\r\n", line_end) != -1
+        position = line_end + 2 + size + 2
+        if position > len(body):
+            return False
+
+
+def http_response_framing(request: bytes, response: bytes) -> bool | None:
+    r"""Check if an HTTP response has been completely received.
+
+    Args:
+        request: Request data the response belongs to
+        response: Response data received so far
+
+    Returns:
+        True if complete, False if incomplete, None if the response is not
+        HTTP or its end can only be told by the connection going silent
+
+    >>> http_response_framing(b'GET / HTTP/1.1\r\n\r\n', b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nOK')
+    True
+    >>> http_response_framing(b'GET / HTTP/1.1\r\n\r\n', b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nO')
+    False
+    >>> http_response_framing(b'HEAD / HTTP/1.1\r\n\r\n', b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n')
+    True
+    >>> http_response_framing(b'PING\r\n', b'+PONG\r\n') is None
+    True
+    """
+    if not response.startswith(b"HTTP/"):
+        return None
+
+    start = 0
+    while True:
+        head_end = response.find(b"\r\n\r\n", start)
+        if head_end == -1:
+            return False
+        status_line, _, raw_headers = bytes(response[start:head_end]).partition(b"\r\n")
+        try:
+            status = int(status_line.split(None, 2)[1])
+        except (IndexError, ValueError):
+            return None
+        body_start = head_end + 4
+        if not (100 <= status < 200) or status == 101:
+            break
+        # interim response (e.g. 100 Continue), the final one follows
+        start = body_start
+
+    if status < 200 or status in (204, 304) or bytes(request[:5]).upper() == b"HEAD ":
+        return True
+
+    headers = {}
+    for line in raw_headers.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip()
+
+    if b"chunked" in headers.get(b"transfer-encoding", b"").lower():
+        return _chunked_body_is_complete(response, body_start)
+    if b"content-length" in headers:
+        try:
+            content_length = int(headers[b"content-length"])
+        except ValueError:
+            return None
+        return len(response) - body_start >= content_length
+    return None
@@ -0,0 +1,88 @@
+"""Lookup index for the entries registered with Mocket."""
+
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Any, Hashable, Iterable
+
+if TYPE_CHECKING:
+    from mocket.entry import MocketEntry
+
+
+class MocketEntryIndex:
+    """Index of the entries registered for a single address.
+
+    Entries exposing an `index_key` are bucketed by their class and key,
+    the other ones are always considered as candidates. Candidates are
+    yielded in registration order, so the first entry able to handle a
+    request keeps winning exactly as with a linear scan.
+    """
+
+    def __init__(self, entries: list[MocketEntry]) -> None:
+        """Initialize the index.
+
+        Args:
+            entries: List of entries to index, new ones get picked up lazily
+        """
+        self._entries = entries
+        self._size = 0
+        # entries indexed so far, for noticing the ones replaced in place
+        self._indexed: list[MocketEntry] = []
+        self._unkeyed: list[tuple[int, MocketEntry]] = []
+        self._keyed: dict[type, dict[Hashable, list[tuple[int, MocketEntry]]]] = {}
+
+    def is_stale(self, entries: list[MocketEntry]) -> bool:
+        """Check if the index can't be kept in sync with `entries` anymore.
+
+        Args:
+            entries: Current list of entries for the address
+
+        Returns:
+            True if the index needs to be rebuilt, False otherwise
+        """
+        if entries is not self._entries or len(entries) < self._size:
+            return True
+        # entries are only expected to be appended, the ones replaced in
+        # place are noticed by comparing the lists (by identity, as
+        # entries don't define __eq__)
+        if len(entries) == self._size:
+            return entries != self._indexed
+        return entries[: self._size] != self._indexed
+
+    def _update(self) -> None:
+        """Index the entries appended since the last update."""
+        for position in range(self._size, len(self._entries)):
+            entry = self._entries[position]
+            key = entry.index_key
+            if key is None:
+                self._unkeyed.append((position, entry))
+            else:
+                buckets = self._keyed.setdefault(entry.__class__, {})
+                buckets.setdefault(key, []).append((position, entry))
+        if self._size < len(self._entries):
+            self._indexed.extend(self._entries[self._size :])
+            self._size = len(self._entries)
+
+    def candidates(self, data: Any) -> Iterable[MocketEntry]:
+        """Get the entries that may be able to handle the request.
+
+        Args:
+            data: Request data
+
+        Returns:
+            Candidate entries, in registration order
+        """
+        self._update()
+        if not self._keyed:
+            return self._entries
+
+        buckets = [self._unkeyed]
+        for entry_cls, keyed in self._keyed.items():
+            request_key = entry_cls.request_index_key(data)
+            if request_key is None:
+                # the request can't be classified, fall back to a full scan
+                return self._entries
+            if request_key in keyed:
+                buckets.append(keyed[request_key])
+
+        return (entry for _, entry in heapq.merge(*buckets))
@@ -2,14 +2,32 @@
 
 from __future__ import annotations
 
+import collections
+import contextlib
 import io
 import os
+import sys
+from itertools import chain
+from typing import Any, Iterator
 
 from mocket.mocket import Mocket
+from mocket.types import ReadableBuffer, WriteableBuffer
 
 
-class MocketSocketIO(io.BytesIO):
-    """A BytesIO wrapper that integrates with Mocket's pipe-based I/O."""
+class MocketSocketIO(io.BufferedIOBase):
+    """Buffer of the data to be received by a socket.
+
+    Data is kept as a queue of immutable segments (e.g. the headers and the
+    body of a response) and read through memoryview slices, so it never
+    gets copied before reaching the reader.
+
+    Segments can also be iterators of bytes (e.g. a streamed body), which
+    are only consumed as the data before them gets read.
+
+    When a file descriptor was requested for the address, it only reports
+    whether there is data to read: the data itself never goes through it,
+    so responses of any size can be waited for with select/selectors.
+    """
 
     def __init__(self, address: tuple) -> None:
         """Initialize the socket I/O with a socket address.
@@ -17,11 +35,24 @@ class MocketSocketIO(io.BytesIO):
         Args:
             address: Tuple of (host, port)
         """
-        self._address = address
         super().__init__()
+        self.address = address
+        self._segments: collections.deque[bytes] = collections.deque()
+        # position of the first unread byte in the first segment
+        self._offset = 0
+        # segments still to be produced, after the ones in self._segments
+        self._stream: Iterator[Any] | None = None
+
+    def readable(self) -> bool:
+        """Tell that the buffer can be read."""
+        return True
 
-    def write(self, content: bytes) -> int:
-        """Write content to the buffer and the pipe if available.
+    def writable(self) -> bool:
+        """Tell that the buffer can be written."""
+        return True
+
+    def write(self, content: ReadableBuffer) -> int:
+        """Append content to the buffer.
 
         Args:
             content: Bytes to write
@@ -29,9 +60,172 @@ class MocketSocketIO(io.BytesIO):
         Returns:
             Number of bytes written
         """
-        super().write(content)
-
-        _, w_fd = Mocket.get_pair(self._address)
-        if w_fd:
-            os.write(w_fd, content)
+        if not isinstance(content, bytes):
+            content = bytes(content)
+        if content:
+            self._segments.append(content)
+            if len(self._segments) == 1:
+                self.signal_readiness()
         return len(content)
+
+    def signal_readiness(self) -> None:
+        """Make the file descriptor of the address readable or not.
+
+        It gets readable if there is unread data, it gets drained otherwise.
+        """
+        r_fd, w_fd = Mocket.get_pair(self.address)
+        if not w_fd:
+            return
+        with contextlib.suppress(BlockingIOError):
+            if self._segments or self._stream is not None:
+                os.write(w_fd, b"\0")
+            else:
+                while os.read(r_fd, 4096):
+                    pass
+
+    def feed(self, *segments: ReadableBuffer | Iterator[ReadableBuffer]) -> None:
+        """Replace the unread data with new segments.
+
+        Args:
+            *segments: Bytes, or iterators of bytes, to be read in order
+        """
+        self._segments.clear()
+        self._offset = 0
+        self._stream = None
+        for position, segment in enumerate(segments):
+            if hasattr(segment, "__next__"):
+                self._stream = chain.from_iterable(
+                    s if hasattr(s, "__next__") else (s,) for s in segments[position:]
+                )
+                break
+            self.write(segment)  # type: ignore[arg-type]
+        if not self._segments:
+            self.signal_readiness()
+
+    def _pull(self) -> bool:
+        """Move the next non-empty chunk of the stream to the segments.
+
+        Returns:
+            True if a chunk was moved, False if the stream is over
+        """
+        while self._stream is not None:
+            chunk = next(self._stream, None)
+            if chunk is None:
+                self._stream = None
+                if not self._segments:
+                    self.signal_readiness()
+            elif chunk:
+                self._segments.append(
+                    chunk if isinstance(chunk, bytes) else bytes(chunk)
+                )
+                return True
+        return False
+
+    def _available(self) -> int:
+        """Get the number of unread bytes, producing the whole stream."""
+        while self._pull():
+            pass
+        return sum(len(segment) for segment in self._segments) - self._offset
+
+    def _consume(self, size: int) -> Iterator[bytes | memoryview]:
+        """Consume unread data.
+
+        Args:
+            size: Maximum number of bytes to consume
+
+        Yields:
+            Whole segments or memoryview slices of them
+        """
+        while size > 0 and (self._segments or self._pull()):
+            segment = self._segments[0]
+            start = self._offset
+            end = min(len(segment), start + size)
+            if start == 0 and end == len(segment):
+                yield segment
+            else:
+                yield memoryview(segment)[start:end]
+            size -= end - start
+            if end == len(segment):
+                self._segments.popleft()
+                self._offset = 0
+                if not self._segments and self._stream is None:
+                    self.signal_readiness()
+            else:
+                self._offset = end
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read unread data.
+
+        Args:
+            size: Maximum number of bytes to read, all of them by default
+
+        Returns:
+            Bytes read
+        """
+        if size is None or size < 0:
+            size = self._available()
+        chunks = list(self._consume(size))
+        if len(chunks) == 1 and isinstance(chunks[0], bytes):
+            return chunks[0]
+        return b"".join(chunks)
+
+    read1 = read
+
+    def readinto(self, buffer: WriteableBuffer) -> int:
+        """Read unread data into a buffer, copying it only once.
+
+        Args:
+            buffer: Writable buffer
+
+        Returns:
+            Number of bytes read
+        """
+        view = memoryview(buffer).cast("B")
+        position = 0
+        for chunk in self._consume(len(view)):
+            view[position : position + len(chunk)] = chunk
+            position += len(chunk)
+        return position
+
+    readinto1 = readinto
+
+    def readline(self, size: int | None = -1) -> bytes:
+        """Read unread data up to the end of the line.
+
+        Args:
+            size: Maximum number of bytes to read
+
+        Returns:
+            Bytes read, including the trailing newline
+        """
+        if size is None or size < 0:
+            size = sys.maxsize
+        length = 0
+        offset = self._offset
+        index = 0
+        while index < len(self._segments) or self._pull():
+            segment = self._segments[index]
+            index += 1
+            end = min(len(segment), offset + size - length)
+            newline = segment.find(b"\n", offset, end)
+            if newline != -1:
+                length += newline + 1 - offset
+                break
+            length += end - offset
+            if length >= size:
+                break
+            offset = 0
+        return self.read(length)
+
+    def peek(self, size: int = 0) -> bytes:
+        """Get unread data without consuming it.
+
+        Args:
+            size: Unused, the rest of the current segment is returned
+
+        Returns:
+            Bytes available
+        """
+        if not self._segments and not self._pull():
+            return b""
+        return self._segments[0][self._offset :]
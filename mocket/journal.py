@@ -0,0 +1,134 @@
+"""Journal of the requests collected by Mocket."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+from typing import Any, MutableSequence
+
+
+class RequestSummary:
+    """Compact record of a collected request.
+
+    Method and path are only known for requests exposing them (e.g. HTTP
+    ones), size and digest refer to the data the request was collected with
+    and to the one added afterwards (e.g. the chunks of its body).
+    """
+
+    __slots__ = ("method", "path", "size", "digest", "_hash")
+    _FIELDS = ("method", "path", "size", "digest")
+
+    def __init__(
+        self, method: str | None, path: str | None, size: int, digest: str
+    ) -> None:
+        """Initialize the summary.
+
+        Args:
+            method: Request method, if any
+            path: Request path, if any
+            size: Size of the request data
+            digest: Hex digest of the request data
+        """
+        self.method = method
+        self.path = path
+        self.size = size
+        self.digest = digest
+        # hash object the digest comes from, if it can be updated
+        self._hash: Any = None
+
+    @classmethod
+    def from_request(cls, request: Any, data: bytes) -> RequestSummary:
+        """Summarize a request.
+
+        Args:
+            request: Request object collected
+            data: Raw request data
+
+        Returns:
+            RequestSummary instance
+        """
+        hash_ = hashlib.blake2b(data, digest_size=8)
+        summary = cls(
+            method=getattr(request, "method", None),
+            path=getattr(request, "path", None),
+            size=len(data),
+            digest=hash_.hexdigest(),
+        )
+        summary._hash = hash_
+        return summary
+
+    def add_data(self, data: bytes) -> None:
+        """Add more data to the summarized request.
+
+        Args:
+            data: Additional raw request data
+
+        Raises:
+            ValueError: If the summary was not made by `from_request`
+        """
+        if self._hash is None:
+            raise ValueError("Only summaries made from a request can be updated.")
+        self._hash.update(data)
+        self.size += len(data)
+        self.digest = self._hash.hexdigest()
+
+    def __eq__(self, other: object) -> bool:
+        """Compare with another summary."""
+        if not isinstance(other, RequestSummary):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the summary."""
+        return (
+            f"{self.__class__.__name__}(method={self.method!r}, path={self.path!r}, "
+            f"size={self.size!r}, digest={self.digest!r})"
+        )
+
+
+class RequestJournal:
+    """Settings of the journal keeping the requests collected by Mocket.
+
+    By default every request object is kept, for the whole test. Long
+    running tests can keep only the last ones, none of them, or compact
+    summaries instead of the request objects.
+    """
+
+    def __init__(self, maxlen: int | None = None, summaries: bool = False) -> None:
+        """Initialize the journal settings.
+
+        Args:
+            maxlen: Number of requests to keep, the last ones, None for all
+            summaries: Keep RequestSummary instances instead of the requests
+
+        Raises:
+            ValueError: If maxlen is negative
+        """
+        if maxlen is not None and maxlen < 0:
+            raise ValueError("The journal can't keep a negative number of requests.")
+        self.maxlen = maxlen
+        self.summaries = summaries
+
+    def new(self) -> MutableSequence[Any]:
+        """Get an empty container for the requests.
+
+        Returns:
+            List, or ring buffer if the journal is bounded
+        """
+        if self.maxlen is None:
+            return []
+        return collections.deque(maxlen=self.maxlen)
+
+    def collect(self, requests: MutableSequence[Any], request: Any, data: Any) -> None:
+        """Add a request to a container.
+
+        Args:
+            requests: Container returned by `new`
+            request: Request object
+            data: Raw request data
+        """
+        if self.maxlen == 0:
+            return
+        if self.summaries:
+            request = RequestSummary.from_request(request, bytes(data))
+        requests.append(request)
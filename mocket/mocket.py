@@ -3,43 +3,130 @@
 from __future__ import annotations
 
 import collections
+import contextlib
 import itertools
 import os
+import threading
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar, Iterator, MutableSequence
 
 import mocket.inject
-from mocket.recording import MocketRecordStorage
+from mocket.framing import http_response_framing
+from mocket.index import MocketEntryIndex
+from mocket.recording import MocketRecordStorage, get_record_storage_cls
+from mocket.state import get_state, pop_enabling, push_enabling
 
 # NOTE this is here for backwards-compat to keep old import-paths working
 # from mocket.socket import MocketSocket as MocketSocket
 
 if TYPE_CHECKING:
     from mocket.entry import MocketEntry
-    from mocket.types import Address
+    from mocket.journal import RequestJournal
+    from mocket.types import Address, RequestCanonicalizer, ResponseFraming
 
 
-class Mocket:
-    """Singleton class managing all mock socket operations and entries."""
+def _state_property(name: str) -> property:
+    """Get a property proxying an attribute of the current MocketState.
 
-    _socket_pairs: ClassVar[dict[Address, tuple[int, int]]] = {}
-    _address: ClassVar[Address | tuple[None, None]] = (None, None)
-    _entries: ClassVar[dict[Address, list[MocketEntry]]] = collections.defaultdict(list)
-    _requests: ClassVar[list] = []
-    _record_storage: ClassVar[MocketRecordStorage | None] = None
+    Args:
+        name: Attribute name
+
+    Returns:
+        Property instance
+    """
+
+    def fget(cls: type) -> Any:
+        return getattr(get_state(), name)
+
+    def fset(cls: type, value: Any) -> None:
+        setattr(get_state(), name, value)
+
+    return property(fget, fset)
+
+
+class _EntriesOverlay(collections.ChainMap):
+    """Entries registered on top of a snapshot of other ones.
+
+    Lookups fall back to the snapshot, the list of entries of an address
+    gets copied the first time it is accessed for registering.
+    """
+
+    def __getitem__(self, address: Any) -> list[MocketEntry]:
+        entries = self.maps[0]
+        if address not in entries:
+            entries[address] = list(self.maps[1].get(address, ()))
+        return entries[address]  # type: ignore[no-any-return]
+
+    def get(self, address: Any, default: Any = None) -> Any:
+        for entries in self.maps:
+            if address in entries:
+                return entries[address]
+        return default
+
+
+class _MocketMeta(type):
+    """Metaclass storing the state of Mocket in the current MocketState."""
+
+    _socket_pairs = _state_property("socket_pairs")
+    _bio_addresses = _state_property("bio_addresses")
+    _address = _state_property("address")
+    _entries = _state_property("entries")
+    _entries_index = _state_property("entries_index")
+    _requests = _state_property("requests")
+    _request_journal = _state_property("request_journal")
+    _record_storage = _state_property("record_storage")
+    _response_framings = _state_property("response_framings")
+    _last_entry = _state_property("last_entry")
+    _scoped_entries = _state_property("scoped_entries")
+    _memo = _state_property("memo")
+
+
+class Mocket(metaclass=_MocketMeta):
+    """Singleton class managing all mock socket operations and entries.
+
+    Its state belongs to the current context, see `mocket.state`.
+    """
+
+    _socket_pairs: ClassVar[dict[Address, tuple[int, int]]]
+    _bio_addresses: ClassVar[set[Address | tuple[None, None]]]
+    _address: ClassVar[Address | tuple[None, None]]
+    _entries: ClassVar[dict[Address, list[MocketEntry]]]
+    _entries_index: ClassVar[dict[Address, MocketEntryIndex]]
+    _requests: ClassVar[MutableSequence[Any]]
+    _request_journal: ClassVar[RequestJournal | None]
+    _record_storage: ClassVar[MocketRecordStorage | None]
+    _response_framings: ClassVar[list[ResponseFraming]]
+    _last_entry: ClassVar[MocketEntry | None]
+    _scoped_entries: ClassVar[list[dict[int, tuple[MocketEntry, int, bool | None]]]]
+    _memo: ClassVar[threading.local]
 
     @classmethod
     def enable(
         cls,
         namespace: str | None = None,
         truesocket_recording_dir: str | None = None,
+        recording_format: str | None = None,
+        request_canonicalizer: RequestCanonicalizer | None = None,
+        asyncio_transport: bool = False,
+        request_journal: RequestJournal | None = None,
     ) -> None:
         """Enable Mocket socket mocking.
 
         Args:
             namespace: Namespace for recording storage (defaults to id of _entries)
             truesocket_recording_dir: Directory to store recorded requests/responses
+            recording_format: Format of the recordings, "json", "jsonl" or "binary"
+            request_canonicalizer: Function rewriting recorded requests before
+                hashing them, e.g. to drop volatile headers
+            asyncio_transport: Serve asyncio connections to mocked addresses
+                through MocketTransport, without sockets
+            request_journal: How to keep the collected requests, all of them
+                by default
         """
+        if request_journal is not None:
+            cls._request_journal = request_journal
+            cls._requests = request_journal.new()
+
         if namespace is None:
             namespace = str(id(cls._entries))
 
@@ -48,19 +135,29 @@ class Mocket:
 
             assert recording_dir.is_dir(), f"Not a directory: {recording_dir}"
 
-            cls._record_storage = MocketRecordStorage(
+            record_storage_cls = get_record_storage_cls(recording_format)
+            cls._record_storage = record_storage_cls(
                 directory=recording_dir,
                 namespace=namespace,
+                canonicalizer=request_canonicalizer,
             )
 
-        mocket.inject.enable()
+        push_enabling(get_state(), asyncio_transport)
+        mocket.inject.enable(asyncio_transport=asyncio_transport)
 
     @classmethod
     def disable(cls) -> None:
-        """Disable Mocket socket mocking and clean up resources."""
-        cls.reset()
+        """Disable Mocket socket mocking and clean up resources.
 
-        mocket.inject.disable()
+        Every call undoes one `enable` call: the state is only reset by the
+        last one, and socket modules get restored once no context has Mocket
+        enabled.
+        """
+        asyncio_transport, last = pop_enabling(get_state())
+        if last:
+            cls.reset()
+        if asyncio_transport is not None:
+            mocket.inject.disable(asyncio_transport=asyncio_transport)
 
     @classmethod
     def get_pair(cls, address: Address) -> tuple[int, int] | tuple[None, None]:
@@ -114,31 +211,141 @@ class Mocket:
         """
         host = host or cls._address[0]
         port = port or cls._address[1]
-        entries = cls._entries.get((host, port), [])
-        for entry in entries:
+        address = (host, port)
+        entries = cls._entries.get(address)
+        if not entries:
+            return None
+
+        index = cls._entries_index.get(address)
+        if index is None or index.is_stale(entries):
+            index = cls._entries_index[address] = MocketEntryIndex(entries)
+
+        for entry in index.candidates(data):
             if entry.can_handle(data):
                 return entry
         return None
 
     @classmethod
-    def collect(cls, data: Any) -> None:
+    def register_response_framing(cls, framing: ResponseFraming) -> None:
+        """Register a function telling when a real response is complete.
+
+        Responses read from real sockets are returned as soon as a framing
+        function says they are complete, instead of waiting for the
+        connection to go silent. Functions registered later take precedence,
+        HTTP framing is available out of the box.
+
+        Args:
+            framing: Function getting the request and the response received
+                so far, returning True if complete, False if incomplete or
+                None if it can't tell
+        """
+        cls._response_framings.insert(0, framing)
+
+    @classmethod
+    def is_response_complete(cls, request: bytes, response: bytes) -> bool | None:
+        """Check if a response read from a real socket is complete.
+
+        Args:
+            request: Request data
+            response: Response data received so far
+
+        Returns:
+            True if complete, False if incomplete, None if unknown
+        """
+        for framing in cls._response_framings:
+            complete = framing(request, response)
+            if complete is not None:
+                return complete
+        return None
+
+    @classmethod
+    def collect(cls, data: Any, raw: Any = None) -> None:
         """Collect a request in the list of all requests.
 
         Args:
             data: Request data to collect
+            raw: Raw request data, if `data` is a request object
         """
-        cls._requests.append(data)
+        journal = cls._request_journal
+        if journal is None:
+            cls._requests.append(data)
+        else:
+            journal.collect(cls._requests, data, data if raw is None else raw)
 
     @classmethod
     def reset(cls) -> None:
         """Reset all Mocket state and clean up file descriptors."""
+        if cls._record_storage:
+            cls._record_storage.flush()
+            cls._record_storage.close()
         for r_fd, w_fd in cls._socket_pairs.values():
             os.close(r_fd)
             os.close(w_fd)
         cls._socket_pairs = {}
+        cls._bio_addresses = set()
         cls._entries = collections.defaultdict(list)
+        cls._entries_index = {}
         cls._requests = []
+        cls._request_journal = None
         cls._record_storage = None
+        cls._response_framings = [http_response_framing]
+        cls._last_entry = None
+        cls._memo = threading.local()
+
+    @classmethod
+    @contextlib.contextmanager
+    def scope(cls) -> Iterator[None]:
+        """Undo the changes made within the block, keeping Mocket enabled.
+
+        Entries registered and requests made within the block are dropped,
+        entries served within it are rewound to where they were and sockets
+        opened within it are closed, while patches and the record storage
+        stay as they are. The entries registered before are not copied,
+        registering new ones for an address only copies the list of that
+        address.
+
+        Yields:
+            None
+        """
+        state = get_state()
+        entries = state.entries
+        requests = state.requests
+        socket_pairs = state.socket_pairs
+        bio_addresses = state.bio_addresses
+        last_entry = state.last_entry
+
+        state.entries = _EntriesOverlay({}, entries)
+        state.requests = state.request_journal.new() if state.request_journal else []
+        state.socket_pairs = dict(socket_pairs)
+        state.bio_addresses = set(bio_addresses)
+        scoped_entries: dict[int, tuple[MocketEntry, int, bool | None]] = {}
+        state.scoped_entries.append(scoped_entries)
+        try:
+            yield
+        finally:
+            state.scoped_entries.pop()
+            for entry, response_index, served in scoped_entries.values():
+                entry.response_index = response_index
+                entry._served = served
+
+            for address, (r_fd, w_fd) in state.socket_pairs.items():
+                if address in socket_pairs:
+                    with contextlib.suppress(BlockingIOError):
+                        # drop the readiness signals left unread
+                        while os.read(r_fd, 4096):
+                            pass
+                else:
+                    os.close(r_fd)
+                    os.close(w_fd)
+
+            if state.record_storage:
+                state.record_storage.flush()
+
+            state.entries = entries
+            state.requests = requests
+            state.socket_pairs = socket_pairs
+            state.bio_addresses = bio_addresses
+            state.last_entry = last_entry
 
     @classmethod
     def last_request(cls) -> Any:
@@ -155,9 +362,11 @@ class Mocket:
         """Get the list of all requests.
 
         Returns:
-            List of all collected requests
+            List of all collected requests, or of the ones kept by the journal
         """
-        return cls._requests
+        if isinstance(cls._requests, list):
+            return cls._requests
+        return list(cls._requests)
 
     @classmethod
     def remove_last_request(cls) -> None:
@@ -172,7 +381,7 @@ class Mocket:
         Returns:
             True if there are requests, False otherwise
         """
-        return bool(cls.request_list())
+        return bool(cls._requests)
 
     @classmethod
     def get_namespace(cls) -> str | None:
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import contextlib
 import re
+import threading
 import time
 from functools import cached_property
 from http.server import BaseHTTPRequestHandler
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, Iterator
 from urllib.parse import parse_qs, unquote, urlsplit
 
 from h11 import SERVER, Connection, Data
@@ -14,27 +16,63 @@ from h11 import Request as H11Request
 
 from mocket.compat import ENCODING, decode_from_bytes, do_the_magic, encode_to_bytes
 from mocket.entry import MocketEntry
+from mocket.journal import RequestSummary
 from mocket.mocket import Mocket
 
 STATUS: dict = {k: v[0] for k, v in BaseHTTPRequestHandler.responses.items()}
 CRLF: str = "\r\n"
 ASCII: str = "ascii"
 
+_http_date: tuple[Any, str] = (None, "")
 
-class Request:
-    """HTTP request parser using h11."""
 
-    _parser: Connection | None = None
-    _event: Any | None = None
+def http_date() -> str:
+    """Get the current date in the format of the Date header.
+
+    It gets formatted at most once per second.
+
+    Returns:
+        Date string, e.g. "Sun, 06 Nov 1994 08:49:37 GMT"
+    """
+    global _http_date
+
+    now = time.gmtime()
+    if _http_date[0] != now:
+        _http_date = (now, time.strftime("%a, %d %b %Y %H:%M:%S GMT", now))
+    return _http_date[1]
+
+
+class Request:
+    """HTTP request, parsed only as far as it gets inspected.
+
+    Only the raw data is kept when the request is collected: the request
+    line is split on first access to `method` or `path`, the h11 parser
+    gets built for `headers`, `body` and `event`.
+    """
+
+    __slots__ = (
+        "_chunks",
+        "_parser",
+        "_event",
+        "_body_chunks",
+        "_request_line",
+        "_headers",
+        "_querystring",
+    )
 
     def __init__(self, data: bytes) -> None:
-        """Initialize the request parser.
+        """Initialize the request.
 
         Args:
             data: Raw HTTP request data
         """
-        self._parser = Connection(SERVER)
-        self.add_data(data)
+        self._chunks: list[bytes] = [data]
+        self._parser: Connection | None = None
+        self._event: Any | None = None
+        self._body_chunks: list | None = None
+        self._request_line: tuple[str, str] | None = None
+        self._headers: dict | None = None
+        self._querystring: dict | None = None
 
     def add_data(self, data: bytes) -> None:
         """Add more data to the request.
@@ -42,7 +80,23 @@ class Request:
         Args:
             data: Additional raw request data
         """
-        self._parser.receive_data(data)
+        if self._parser is None:
+            self._chunks.append(data)
+        else:
+            self._parser.receive_data(data)
+
+    def _get_parser(self) -> Connection:
+        """Get the h11 parser, feeding it the data received so far.
+
+        Returns:
+            The h11 connection
+        """
+        if self._parser is None:
+            self._parser = Connection(SERVER)
+            for chunk in self._chunks:
+                self._parser.receive_data(chunk)
+            self._chunks = []
+        return self._parser
 
     @property
     def event(self) -> Any:
@@ -52,63 +106,96 @@ class Request:
             The h11 request event
         """
         if not self._event:
-            self._event = self._parser.next_event()
+            self._event = self._get_parser().next_event()
         return self._event
 
-    @cached_property
+    def _get_request_line(self) -> tuple[str, str]:
+        """Get the method and the target of the request.
+
+        Returns:
+            Tuple of (method, target)
+        """
+        if self._request_line is None:
+            parsed = ParsedRequest.parse(self._chunks[0]) if self._chunks else None
+            if parsed is not None:
+                self._request_line = (parsed.method, parsed.target)
+            else:
+                self._request_line = (
+                    self.event.method.decode(ASCII),
+                    self.event.target.decode(ASCII),
+                )
+        return self._request_line
+
+    @property
     def method(self) -> str:
         """Get the HTTP method.
 
         Returns:
             HTTP method (GET, POST, etc.)
         """
-        return self.event.method.decode(ASCII)
+        return self._get_request_line()[0]
 
-    @cached_property
+    @property
     def path(self) -> str:
         """Get the request path.
 
         Returns:
             Request path with query string
         """
-        return self.event.target.decode(ASCII)
+        return self._get_request_line()[1]
 
-    @cached_property
+    @property
     def headers(self) -> dict:
         """Get the request headers.
 
         Returns:
             Dictionary of header names to values
         """
-        return {k.decode(ASCII): v.decode(ASCII) for k, v in self.event.headers}
+        if self._headers is None:
+            self._headers = {
+                k.decode(ASCII): v.decode(ASCII) for k, v in self.event.headers
+            }
+        return self._headers
 
-    @cached_property
+    @property
     def querystring(self) -> dict:
         """Get the parsed query string.
 
         Returns:
             Dictionary of query parameter names to lists of values
         """
-        parts = self.path.split("?", 1)
-        return (
-            parse_qs(unquote(parts[1]), keep_blank_values=True)
-            if len(parts) == 2
-            else {}
-        )
+        if self._querystring is None:
+            parts = self.path.split("?", 1)
+            self._querystring = (
+                parse_qs(unquote(parts[1]), keep_blank_values=True)
+                if len(parts) == 2
+                else {}
+            )
+        return self._querystring
 
-    @cached_property
+    @property
     def body(self) -> str:
         """Get the request body.
 
+        The body is only materialized when accessed, including the
+        data added since the last access.
+
         Returns:
             Decoded request body string
         """
+        parser = self._get_parser()
+        if self._body_chunks is None:
+            self._body_chunks = []
         while True:
-            event = self._parser.next_event()
+            event = parser.next_event()
             if isinstance(event, H11Request):
                 self._event = event
             elif isinstance(event, Data):
-                return event.data.decode(ENCODING)
+                self._body_chunks.append(event.data)
+            else:
+                # end of message, or waiting for more data
+                break
+        return b"".join(self._body_chunks).decode(ENCODING)
 
     def __str__(self) -> str:
         """Get string representation of request.
@@ -119,11 +206,154 @@ class Request:
         return f"{self.method} - {self.path} - {self.headers}"
 
 
+class ParsedRequest:
+    """Request line and head offsets of raw HTTP request data.
+
+    It gets computed once per sent chunk and shared by all the entries
+    checking whether they can handle it, only the request line is decoded.
+    """
+
+    def __init__(
+        self,
+        data: bytes,
+        method: str,
+        target: str,
+        version: str,
+        headers_start: int,
+        headers_end: int,
+    ) -> None:
+        """Initialize a parsed request.
+
+        Args:
+            data: Raw HTTP request data
+            method: HTTP method (GET, POST, etc.)
+            target: Request target, with query string
+            version: HTTP version
+            headers_start: Offset of the first header line in data
+            headers_end: Offset of the blank line ending the head, -1 if incomplete
+        """
+        self.data = data
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers_start = headers_start
+        self.headers_end = headers_end
+
+    @classmethod
+    def parse(cls, data: bytes) -> ParsedRequest | None:
+        r"""Parse the head of raw HTTP request data.
+
+        The result for the last parsed request head is memoized in the
+        Mocket state, data not starting with a method is not parsed.
+
+        Args:
+            data: Raw HTTP request data
+
+        Returns:
+            ParsedRequest or None if data does not start with a request line
+
+        >>> r = ParsedRequest.parse(b'GET /foo?bar=foobar HTTP/1.1\r\nHost: github.com\r\n\r\n')
+        >>> r.method, r.path, r.query, r.headers_start, r.headers_end
+        ('GET', '/foo', {'bar': ['foobar']}, 30, 46)
+        >>> ParsedRequest.parse(b'a body chunk') is None
+        True
+        """
+        if not isinstance(data, bytes):
+            return cls._parse(data)
+        if not data[:7].upper().startswith(_METHOD_PREFIXES):
+            # body chunks are neither parsed nor kept alive by the memo
+            return None
+
+        memo = Mocket._memo
+        last = getattr(memo, "parsed_request", None)
+        if last is not None and last[0] is data:
+            return last[1]
+
+        request = cls._parse(data)
+        if request is not None:
+            memo.parsed_request = (data, request)
+        return request
+
+    @classmethod
+    def _parse(cls, data: Any) -> ParsedRequest | None:
+        """Parse the head of raw HTTP request data, see `parse`.
+
+        Args:
+            data: Raw HTTP request data
+
+        Returns:
+            ParsedRequest or None if data does not start with a request line
+        """
+        if isinstance(data, str):
+            data = encode_to_bytes(data)
+        elif isinstance(data, memoryview):
+            data = data.tobytes()
+        elif not isinstance(data, (bytes, bytearray)):
+            return None
+
+        line_end = data.find(b"\r\n")
+        if line_end == -1:
+            return None
+        try:
+            method, target, version = Entry._parse_requestline(
+                decode_from_bytes(bytes(data[:line_end]))
+            )
+        except ValueError:
+            return None
+
+        return cls(
+            data=data,
+            method=method,
+            target=target,
+            version=version,
+            headers_start=line_end + 2,
+            headers_end=data.find(b"\r\n\r\n", line_end),
+        )
+
+    @cached_property
+    def path(self) -> str:
+        """Get the request path.
+
+        Returns:
+            Request path without query string
+        """
+        return urlsplit(self.target).path
+
+    @cached_property
+    def query(self) -> dict:
+        """Get the parsed query string.
+
+        Returns:
+            Dictionary of query parameter names to lists of values
+        """
+        return parse_qs(urlsplit(self.target).query, keep_blank_values=True)
+
+
 class Response:
-    """HTTP response builder."""
+    """HTTP response builder.
+
+    Status line and headers are rendered when the response is first sent,
+    and again after `set_base_headers` or `set_extra_headers` change them,
+    identical responses share the same bytes. The Date header is the
+    creation date, unless `live_date` is set: then it gets refreshed
+    whenever the response is sent, if a second has passed. Setting `data`
+    replaces the whole response, sent as it is.
+
+    The Content-Type of file objects is sniffed from their content, unless
+    it is given or `sniff_content_type` is unset.
+    """
 
     headers: dict | None = None
     is_file_object: bool = False
+    live_date: bool = False
+    sniff_content_type: bool = True
+
+    protocol_data_cache_size: int = 1024
+    _protocol_data_cache: dict[tuple, bytes] = {}
+    _protocol_data_lock = threading.Lock()
+    _protocol_data: bytes | None = None
+    _date_header: str | None = None
+    _data: bytes | None = None
 
     def __init__(
         self, body: Any = "", status: int = 200, headers: dict | None = None
@@ -136,18 +366,52 @@ class Response:
             headers: Dictionary of response headers
         """
         headers = headers or {}
-        try:
+        read = getattr(body, "read", None)
+        if read is not None:
             #  File Objects
-            self.body = body.read()
+            self.body = read()
             self.is_file_object = True
-        except AttributeError:
+        else:
             self.body = encode_to_bytes(body)
         self.status = status
+        if any(name.lower() == "content-type" for name in headers):
+            # no need to sniff a Content-Type getting overridden
+            self.sniff_content_type = False
 
         self.set_base_headers()
         self.set_extra_headers(headers)
 
-        self.data = self.get_protocol_data() + self.body
+    @property
+    def segments(self) -> tuple[bytes, ...]:
+        """Get the response split in headers and body."""
+        if self._data is not None:
+            return (self._data,)
+
+        if self._protocol_data is None:
+            self._date_header = next(
+                (name for name in self.headers if name.lower() == "date"), None
+            )
+            self._protocol_data = self.get_protocol_data()
+        if self.live_date and self._date_header is not None:
+            date = http_date()
+            if self.headers[self._date_header] != date:
+                self.headers[self._date_header] = date
+                self._protocol_data = self.get_protocol_data()
+        return self._protocol_data, self.body
+
+    @property
+    def data(self) -> bytes:
+        """Get the whole response, headers and body."""
+        return b"".join(self.segments)
+
+    @data.setter
+    def data(self, data: bytes) -> None:
+        """Replace the whole response.
+
+        Args:
+            data: Raw response, sent as it is
+        """
+        self._data = data
 
     def get_protocol_data(self, str_format_fun_name: str = "capitalize") -> bytes:
         """Get the HTTP protocol headers and status line.
@@ -158,6 +422,15 @@ class Response:
         Returns:
             Bytes of protocol headers (status line and headers)
         """
+        try:
+            key = (self.status, str_format_fun_name, *self.headers.items())
+            protocol_data = self._protocol_data_cache.get(key)
+        except TypeError:
+            # unhashable header values
+            key, protocol_data = None, None
+        if protocol_data is not None:
+            return protocol_data
+
         status_line = f"HTTP/1.1 {self.status} {STATUS[self.status]}"
         header_lines = CRLF.join(
             (
@@ -165,21 +438,32 @@ class Response:
                 for k, v in self.headers.items()
             )
         )
-        return f"{status_line}\r\n{header_lines}\r\n\r\n".encode(ENCODING)
+        protocol_data = f"{status_line}\r\n{header_lines}\r\n\r\n".encode(ENCODING)
+
+        if key is not None:
+            cache = self._protocol_data_cache
+            with self._protocol_data_lock:
+                if len(cache) >= self.protocol_data_cache_size:
+                    del cache[next(iter(cache))]
+                cache[key] = protocol_data
+        return protocol_data
 
     def set_base_headers(self) -> None:
         """Set the base response headers."""
         self.headers = {
             "Status": str(self.status),
-            "Date": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+            "Date": http_date(),
             "Server": "Python/Mocket",
             "Connection": "close",
             "Content-Length": str(len(self.body)),
         }
         if not self.is_file_object:
             self.headers["Content-Type"] = f"text/plain; charset={ENCODING}"
-        else:
+        elif self.sniff_content_type:
             self.headers["Content-Type"] = do_the_magic(self.body)
+        else:
+            self.headers["Content-Type"] = "application/octet-stream"
+        self._protocol_data = None
 
     def set_extra_headers(self, headers: dict) -> None:
         r"""Add extra headers to the response.
@@ -198,6 +482,121 @@ class Response:
         """
         for k, v in headers.items():
             self.headers["-".join(token.capitalize() for token in k.split("-"))] = v
+        self._protocol_data = None
+
+
+class StreamingResponse(Response):
+    """HTTP response whose body is produced while the client reads it.
+
+    The body is an iterable of chunks (e.g. a generator) or a file object,
+    read `chunk_size` bytes at a time, so it never needs to fit in memory.
+    It is sent as it is when a Content-Length header is given, with the
+    chunked transfer encoding otherwise.
+
+    Seekable file objects are rewound whenever the response is sent,
+    other bodies can only be sent once.
+    """
+
+    chunk_size: int = 64 * 1024
+    sniff_content_type: bool = False
+
+    def __init__(
+        self,
+        body: Iterable[str | bytes] | Any,
+        status: int = 200,
+        headers: dict | None = None,
+    ) -> None:
+        """Initialize a streaming HTTP response.
+
+        Args:
+            body: Iterable of chunks or file-like object
+            status: HTTP status code
+            headers: Dictionary of response headers
+        """
+        headers = headers or {}
+        self._source = body
+        self._start: int | None = None
+        with contextlib.suppress(AttributeError, OSError):
+            if body.seekable():
+                self._start = body.tell()
+        self.chunked = not any(name.lower() == "content-length" for name in headers)
+        super().__init__(b"", status, headers)
+
+    def set_base_headers(self) -> None:
+        """Set the base response headers, the length of the body is unknown."""
+        self.is_file_object = hasattr(self._source, "read")
+        super().set_base_headers()
+        del self.headers["Content-Length"]
+        if self.chunked:
+            self.headers["Transfer-Encoding"] = "chunked"
+
+    @property
+    def segments(self) -> tuple[Any, ...]:
+        """Get the response split in headers and a lazy iterator of the body."""
+        if self._data is not None:
+            return (self._data,)
+
+        protocol_data, _ = super().segments
+        chunks = self._iter_source()
+        if self.chunked:
+            chunks = self._frame(chunks)
+        return protocol_data, chunks
+
+    @property
+    def data(self) -> bytes:
+        """Get the whole response, reading the whole body."""
+        if self._data is not None:
+            return self._data
+
+        protocol_data, body = self.segments
+        return protocol_data + b"".join(body)  # type: ignore[no-any-return]
+
+    @data.setter
+    def data(self, data: bytes) -> None:
+        """Replace the whole response.
+
+        Args:
+            data: Raw response, sent as it is
+        """
+        self._data = data
+
+    def _iter_source(self) -> Iterator[bytes]:
+        """Iterate over the chunks of the body.
+
+        Yields:
+            Chunks as bytes
+        """
+        read = getattr(self._source, "read", None)
+        if read is None:
+            for chunk in self._source:
+                yield encode_to_bytes(chunk)
+            return
+
+        if self._start is not None:
+            self._source.seek(self._start)
+        while True:
+            chunk = read(self.chunk_size)
+            if not chunk:
+                return
+            yield encode_to_bytes(chunk)
+
+    @staticmethod
+    def _frame(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Frame chunks with the chunked transfer encoding.
+
+        Args:
+            chunks: Chunks of the body
+
+        Yields:
+            Size lines, chunks and the final empty chunk
+        """
+        for chunk in chunks:
+            # an empty chunk would end the body
+            if chunk:
+                yield b"%x\r\n" % len(chunk)
+                yield chunk
+                yield b"\r\n"
+        yield b"0\r\n\r\n"
 
 
 class Entry(MocketEntry):
@@ -214,6 +613,9 @@ class Entry(MocketEntry):
     TRACE = "TRACE"
 
     METHODS: tuple = (CONNECT, DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT, TRACE)
+    REQUESTLINE_RE: re.Pattern = re.compile(
+        r"({})\s+(.*)\s+HTTP/(1.[0|1])".format("|".join(METHODS)), re.I
+    )
 
     request_cls: type = Request
     response_cls: type = Response
@@ -251,7 +653,7 @@ class Entry(MocketEntry):
         self.path = uri.path or "/"
         self.query = uri.query
         self.method = method.upper()
-        self._sent_data = b""
+        self._request: Any | None = None
         self._match_querystring = match_querystring
 
     def __repr__(self) -> str:
@@ -271,17 +673,18 @@ class Entry(MocketEntry):
         Returns:
             Whether to consume the response
         """
-        consume_response = True
-
-        decoded_data = decode_from_bytes(data)
-        if not decoded_data.startswith(Entry.METHODS):
-            Mocket.remove_last_request()
-            self._sent_data += data
-            consume_response = False
+        # no need to decode the whole payload for checking the method
+        consume_response = decode_from_bytes(bytes(data[:16])).startswith(Entry.METHODS)
+
+        if not consume_response and self._request is not None:
+            # a chunk of the body, fed to the parser of the last request
+            self._request.add_data(data)
+            summary = Mocket.last_request()
+            if isinstance(summary, RequestSummary):
+                summary.add_data(data)
         else:
-            self._sent_data = data
-
-        super().collect(self._sent_data)
+            self._request = self.request_cls(data)
+            Mocket.collect(self._request, data)
 
         return consume_response
 
@@ -302,6 +705,44 @@ class Entry(MocketEntry):
             )
         return can_handle
 
+    @property
+    def index_key(self) -> tuple[str, str] | None:
+        """Get the key used for indexing the entry.
+
+        Entries with a custom matching logic can't be indexed.
+
+        Returns:
+            Tuple of (method, path) or None
+        """
+        if (
+            self._can_handle_fun != self._can_handle
+            or self.__class__._can_handle is not Entry._can_handle
+            or self.__class__.can_handle is not Entry.can_handle
+            or self.__class__.can_handle_request is not Entry.can_handle_request
+        ):
+            return None
+        return self.method, self.path
+
+    @classmethod
+    def request_index_key(cls, data: bytes) -> tuple[str, str] | None:
+        r"""Get the index key of the given request data.
+
+        Args:
+            data: Request data
+
+        Returns:
+            Tuple of (method, path) or None if data is not a request head
+
+        >>> Entry.request_index_key(b'GET /foo?bar=foobar HTTP/1.1\r\nHost: github.com\r\n\r\n')
+        ('GET', '/foo')
+        >>> Entry.request_index_key(b'a body chunk') is None
+        True
+        """
+        request = ParsedRequest.parse(data)
+        if request is None:
+            return None
+        return request.method, request.path
+
     def can_handle(self, data: bytes) -> bool:
         r"""Check if this entry can handle the given request data.
 
@@ -318,22 +759,32 @@ class Entry(MocketEntry):
         >>> e.can_handle(b'GET /?bar=foo&foobar HTTP/1.1\r\nHost: github.com\r\nAccept-Encoding: gzip, deflate\r\nConnection: keep-alive\r\nUser-Agent: python-requests/2.7.0 CPython/3.4.3 Linux/3.19.0-16-generic\r\nAccept: */*\r\n\r\n')
         True
         """
-        try:
-            requestline, _ = decode_from_bytes(data).split(CRLF, 1)
-            method, path, _ = self._parse_requestline(requestline)
-        except ValueError:
+        request = ParsedRequest.parse(data)
+        if request is None:
             return self is getattr(Mocket, "_last_entry", None)
 
-        _request = urlsplit(path)
-
-        can_handle = method == self.method and self._can_handle_fun(
-            _request.path, parse_qs(_request.query, keep_blank_values=True)
-        )
+        can_handle = self.can_handle_request(request)
 
         if can_handle:
             Mocket._last_entry = self
         return can_handle
 
+    def can_handle_request(self, request: ParsedRequest) -> bool:
+        """Check if this entry can handle the given parsed request.
+
+        Override this method instead of `can_handle` for receiving the
+        request head already parsed.
+
+        Args:
+            request: Parsed request, shared with the other entries
+
+        Returns:
+            True if this entry can handle the request
+        """
+        return request.method == self.method and self._can_handle_fun(
+            request.path, request.query
+        )
+
     @staticmethod
     def _parse_requestline(line: str) -> tuple:
         """Parse an HTTP request line.
@@ -358,9 +809,7 @@ class Entry(MocketEntry):
             ...
         ValueError: Not a Request-Line
         """
-        m = re.match(
-            r"({})\s+(.*)\s+HTTP/(1.[0|1])".format("|".join(Entry.METHODS)), line, re.I
-        )
+        m = Entry.REQUESTLINE_RE.match(line)
         if m:
             return m.group(1).upper(), m.group(2), m.group(3)
         raise ValueError("Not a Request-Line")
@@ -435,3 +884,7 @@ class Entry(MocketEntry):
             can_handle_fun=can_handle_fun,
             **config,
         )
+
+
+# how the request lines recognized by ParsedRequest start
+_METHOD_PREFIXES: tuple[bytes, ...] = tuple(method.encode() for method in Entry.METHODS)
@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
-from itertools import chain
-from typing import Any
+import inspect
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from fnmatch import fnmatchcase
+from itertools import chain, count, islice
+from typing import Any, Callable, Hashable, Iterable
 
 from mocket.compat import (
+    ENCODING,
     decode_from_bytes,
     encode_to_bytes,
     shsplit,
@@ -67,24 +74,7 @@ class Redisizer(bytes):
         Returns:
             Redisizer bytes
         """
-
-        def get_conversion(t: type) -> Any:
-            return {
-                dict: lambda x: b"\r\n".join(
-                    Redisizer.tokens(list(chain(*tuple(x.items()))))
-                ),
-                int: lambda x: f":{x}".encode(),
-                str: lambda x: "${}\r\n{}".format(len(x.encode("utf-8")), x).encode(
-                    "utf-8"
-                ),
-                list: lambda x: b"\r\n".join(Redisizer.tokens(x)),
-            }[t]
-
-        if isinstance(data, Redisizer):
-            return data
-        if isinstance(data, bytes):
-            data = decode_from_bytes(data)
-        return Redisizer(get_conversion(data.__class__)(data) + b"\r\n")
+        return Redisizer.encode(data)
 
     @staticmethod
     def command(description: str, _type: str = "+") -> Redisizer:
@@ -111,10 +101,210 @@ class Redisizer(bytes):
         """
         return Redisizer.command(description, _type="-")
 
+    @staticmethod
+    def encode(data: Any, resp3: bool = False) -> Redisizer:
+        r"""Encode Python data, possibly nested, in a single buffer.
+
+        Text is encoded as bulk strings, bytes are kept as they are and
+        Redisizer instances are inserted unchanged. Maps, sets, doubles,
+        booleans, big numbers and nulls get their RESP3 types if `resp3`
+        is set, the RESP2 equivalent otherwise.
+
+        Args:
+            data: str, bytes, int, float, bool, None, list, tuple, dict,
+                set or Redisizer
+            resp3: Use the RESP3 types
+
+        Returns:
+            Redisizer bytes
+
+        Raises:
+            TypeError: If data, or one of its items, can't be encoded
+
+        >>> Redisizer.encode([b"a", 1, None, {"b": 1.5}])
+        b'*4\r\n$1\r\na\r\n:1\r\n$-1\r\n*2\r\n$1\r\nb\r\n$3\r\n1.5\r\n'
+        >>> Redisizer.encode([b"a", 1, None, {"b": 1.5}], resp3=True)
+        b'*4\r\n$1\r\na\r\n:1\r\n_\r\n%1\r\n$1\r\nb\r\n,1.5\r\n'
+        """
+        if type(data) is Redisizer:
+            return data
+        buffer = bytearray()
+        _write(buffer, data, resp3)
+        return Redisizer(buffer)
+
 
 OK = Redisizer.command("OK")
 QUEUED = Redisizer.command("QUEUED")
 ERROR = Redisizer.error
+NIL = Redisizer(b"$-1\r\n")
+NULL_ARRAY = Redisizer(b"*-1\r\n")
+
+
+def _write(buffer: bytearray, data: Any, resp3: bool) -> None:
+    """Append the RESP encoding of data to a buffer.
+
+    Args:
+        buffer: Buffer
+        data: Python data to encode
+        resp3: Use the RESP3 types
+
+    Raises:
+        TypeError: If data can't be encoded
+    """
+    if isinstance(data, bytes):
+        if type(data) is Redisizer:
+            buffer += data
+        else:
+            buffer += b"$%d\r\n%s\r\n" % (len(data), data)
+    elif isinstance(data, str):
+        _write(buffer, data.encode(ENCODING), resp3)
+    elif isinstance(data, (list, tuple, set, frozenset)):
+        prefix = b"~" if resp3 and isinstance(data, (set, frozenset)) else b"*"
+        buffer += b"%s%d\r\n" % (prefix, len(data))
+        _write_items(buffer, data, resp3)
+    elif isinstance(data, dict):
+        if resp3:
+            buffer += b"%%%d\r\n" % len(data)
+        else:
+            buffer += b"*%d\r\n" % (len(data) * 2)
+        _write_items(buffer, chain.from_iterable(data.items()), resp3)
+    elif data is None:
+        buffer += b"_\r\n" if resp3 else b"$-1\r\n"
+    elif isinstance(data, bool):
+        if resp3:
+            buffer += b"#t\r\n" if data else b"#f\r\n"
+        else:
+            buffer += b":%d\r\n" % data
+    elif isinstance(data, int):
+        if resp3 and not -(2**63) <= data < 2**63:
+            buffer += b"(%d\r\n" % data
+        else:
+            buffer += b":%d\r\n" % data
+    elif isinstance(data, float):
+        if resp3:
+            buffer += b",%s\r\n" % _format_double(data)
+        else:
+            _write(buffer, _format_double(data), resp3)
+    elif isinstance(data, (bytearray, memoryview)):
+        _write(buffer, bytes(data), resp3)
+    else:
+        raise TypeError(f"Can't encode {type(data).__name__} in RESP")
+
+
+def _write_items(buffer: bytearray, items: Iterable[Any], resp3: bool) -> None:
+    """Append the RESP encoding of the items of an aggregate to a buffer.
+
+    Args:
+        buffer: Buffer
+        items: Items, keys and values alternated for maps
+        resp3: Use the RESP3 types
+    """
+    for item in items:
+        # most aggregates are made of bulk strings
+        kind = type(item)
+        if kind is str:
+            item = item.encode(ENCODING)
+        elif kind is not bytes:
+            _write(buffer, item, resp3)
+            continue
+        buffer += b"$%d\r\n%s\r\n" % (len(item), item)
+
+
+def _format_double(value: float) -> bytes:
+    """Format a double the way Redis does.
+
+    Args:
+        value: Double, e.g. the score of a sorted set member
+
+    Returns:
+        Double as bytes
+    """
+    if value.is_integer():
+        return b"%d" % value
+    return repr(value).encode()
+
+
+def split_commands(data: bytes) -> list[bytes] | None:
+    r"""Split a RESP payload in the commands it is made of.
+
+    Args:
+        data: Raw Redis data, e.g. a pipeline or a MULTI/EXEC transaction
+
+    Returns:
+        List of commands, None if data is not made of complete RESP arrays
+
+    >>> split_commands(b"*1\r\n$4\r\nPING\r\n*2\r\n$3\r\nGET\r\n$1\r\na\r\n")
+    [b'*1\r\n$4\r\nPING\r\n', b'*2\r\n$3\r\nGET\r\n$1\r\na\r\n']
+    >>> split_commands(b"*2\r\n$3\r\nGET\r\n") is None
+    True
+    """
+    commands = []
+    position = 0
+    while position < len(data):
+        start = position
+        count, position = _read_length(data, position, b"*")
+        for _ in range(count):
+            length, position = _read_length(data, position, b"$")
+            position += length + 2
+            if length < 0 or data[position - 2 : position] != b"\r\n":
+                return None
+        if count < 0:
+            return None
+        commands.append(data[start:position])
+    return commands
+
+
+def _read_length(data: bytes, position: int, prefix: bytes) -> tuple[int, int]:
+    """Read the length line of a RESP array or bulk string.
+
+    Args:
+        data: Raw Redis data
+        position: Offset of the line
+        prefix: Expected type prefix
+
+    Returns:
+        Tuple of (length, offset of the following line), length is -1 if
+        the line is missing or malformed
+    """
+    end = data.find(b"\r\n", position)
+    if end == -1 or data[position : position + 1] != prefix:
+        return -1, len(data)
+    try:
+        return int(data[position + 1 : end]), end + 2
+    except ValueError:
+        return -1, len(data)
+
+
+def _get_pipeline(
+    location: Address, data: bytes, commands: list[bytes]
+) -> list[MocketEntry] | None:
+    """Get the entries handling the commands of a payload, one by one.
+
+    The result for the last payload is memoized in the Mocket state.
+
+    Args:
+        location: (host, port) tuple
+        data: Raw Redis data
+        commands: Commands data is made of
+
+    Returns:
+        List of entries, None if a command has no entry
+    """
+    memo = Mocket._memo
+    last = getattr(memo, "redis_pipeline", None)
+    if last is not None and last[0] is data and last[1] == location:
+        return last[2]  # type: ignore[no-any-return]
+
+    host, port = location
+    entries: list[MocketEntry] | None = []
+    for command in commands:
+        entry = Mocket.get_entry(host, port, command)
+        if entry is None:
+            entries = None
+            break
+        entries.append(entry)  # type: ignore[union-attr]
+    memo.redis_pipeline = (data, location, entries)
+    return entries
 
 
 class Entry(MocketEntry):
@@ -137,17 +327,113 @@ class Entry(MocketEntry):
         d = shsplit(command)
         d[0] = d[0].upper()
         self.command = Redisizer.tokens(d)
+        self._pipeline: list[MocketEntry] | None = None
+
+    @property
+    def index_key(self) -> bytes | None:
+        """Get the key used for indexing the entry.
+
+        Entries with a custom matching logic can't be indexed.
+
+        Returns:
+            RESP encoded command or None
+        """
+        if self.__class__.can_handle is not Entry.can_handle:
+            return None
+        return b"\r\n".join(self.command) + b"\r\n"
+
+    @classmethod
+    def request_index_key(cls, data: bytes) -> Hashable | None:
+        r"""Get the index key of the given request data.
+
+        Payloads made of several commands get the key of the first one.
+
+        Args:
+            data: Raw Redis data
+
+        Returns:
+            RESP encoded command or None if data is not made of RESP commands
+
+        >>> Entry.request_index_key(b"*1\r\n$4\r\nPING\r\n*1\r\n$4\r\nPING\r\n")
+        b'*1\r\n$4\r\nPING\r\n'
+        >>> Entry.request_index_key(b"PING\r\n") is None
+        True
+        """
+        if not isinstance(data, bytes):
+            return None
+        commands = split_commands(data)
+        if not commands:
+            return None
+        return commands[0]
 
     def can_handle(self, data: bytes) -> bool:
         """Check if this entry can handle the given command.
 
+        Payloads made of several commands (pipelines, transactions) are
+        handled by the entry of the first command, as long as every
+        command has an entry.
+
         Args:
             data: Raw Redis command data
 
         Returns:
             True if this entry matches the command
         """
-        return data.splitlines() == self.command
+        commands = self._split(data)
+        if commands is None:
+            return data.splitlines() == self.command
+        return (
+            commands[0].splitlines() == self.command
+            and _get_pipeline(self.location, data, commands) is not None
+        )
+
+    @staticmethod
+    def _split(data: bytes) -> list[bytes] | None:
+        """Split a payload made of several commands.
+
+        Args:
+            data: Raw Redis data
+
+        Returns:
+            List of commands, None for a single command or unknown data
+        """
+        if not isinstance(data, bytes) or data.count(b"*") < 2:
+            return None
+        commands = split_commands(data)
+        if commands is None or len(commands) < 2:
+            return None
+        return commands
+
+    def collect(self, data: bytes) -> None:
+        """Collect the request data, command by command.
+
+        Args:
+            data: Raw Redis data
+        """
+        commands = self._split(data)
+        if commands is None:
+            self._pipeline = None
+            super().collect(data)
+            return
+
+        pipeline = _get_pipeline(self.location, data, commands)
+        assert pipeline is not None
+        for entry, command in zip(pipeline, commands):
+            entry.collect(command)
+        self._pipeline = pipeline
+
+    def get_response_segments(self) -> tuple[bytes, ...]:
+        """Get the next response, or the ones of all the commands collected.
+
+        Returns:
+            Tuple of responses, in the order of the commands
+        """
+        pipeline, self._pipeline = self._pipeline, None
+        if pipeline is None:
+            return super().get_response_segments()
+        return tuple(
+            chain.from_iterable(entry.get_response_segments() for entry in pipeline)
+        )
 
     @classmethod
     def register(cls, addr: Address | None, command: str, *responses: Any) -> None:
@@ -189,3 +475,1300 @@ class Entry(MocketEntry):
             addr: (host, port) tuple or None for default
         """
         cls.register(addr, command, *responses)
+
+
+def parse_command(command: bytes) -> list[bytes]:
+    r"""Get the arguments of a command returned by `split_commands`.
+
+    Args:
+        command: RESP array of bulk strings
+
+    Returns:
+        List of arguments, starting with the command name
+
+    >>> parse_command(b"*2\r\n$3\r\nGET\r\n$1\r\na\r\n")
+    [b'GET', b'a']
+    """
+    count, position = _read_length(command, 0, b"*")
+    args = []
+    for _ in range(count):
+        length, position = _read_length(command, position, b"$")
+        args.append(command[position : position + length])
+        position += length + 2
+    return args
+
+
+class _ReplyError(Exception):
+    """Error replied to a command by the stateful engine."""
+
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+def _wrong_arity(name: bytes) -> _ReplyError:
+    """Get the error replied to a command with a wrong number of arguments.
+
+    Args:
+        name: Command name
+
+    Returns:
+        _ReplyError instance
+    """
+    return _ReplyError(
+        f"ERR wrong number of arguments for '{decode_from_bytes(name.lower())}' command"
+    )
+
+
+# what Redis parses as a 64 bit integer, without spaces, signs or underscores
+_INTEGER = re.compile(rb"-?[1-9][0-9]*|0")
+
+
+def _int(value: bytes) -> int:
+    """Parse an integer argument.
+
+    Args:
+        value: Argument
+
+    Returns:
+        Integer value
+
+    Raises:
+        _ReplyError: If the argument is not an integer
+    """
+    if _INTEGER.fullmatch(value) is None or not -(2**63) <= int(value) < 2**63:
+        raise _ReplyError("ERR value is not an integer or out of range")
+    return int(value)
+
+
+def _float(value: bytes) -> float:
+    """Parse a float argument.
+
+    Args:
+        value: Argument
+
+    Returns:
+        Float value
+
+    Raises:
+        _ReplyError: If the argument is not a float
+    """
+    try:
+        return float(value)
+    except ValueError:
+        raise _ReplyError("ERR value is not a valid float") from None
+
+
+def _score_bound(value: bytes) -> tuple[float, bool]:
+    """Parse a score bound, e.g. "(1.5" or "-inf".
+
+    Args:
+        value: Argument
+
+    Returns:
+        Tuple of (score, exclusive)
+
+    Raises:
+        _ReplyError: If the bound is not a float
+    """
+    exclusive = value.startswith(b"(")
+    try:
+        return float(value[1:] if exclusive else value), exclusive
+    except ValueError:
+        raise _ReplyError("ERR min or max is not a float") from None
+
+
+def _index_range(length: int, start: int, stop: int) -> slice:
+    """Get the slice of an inclusive range of indexes, possibly negative.
+
+    Args:
+        length: Length of the sequence
+        start: First index
+        stop: Last index
+
+    Returns:
+        Slice to apply to the sequence
+    """
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop += length
+    if start > stop:
+        return slice(0, 0)
+    return slice(start, stop + 1)
+
+
+def _deadline(unit: bytes, value: int) -> float:
+    """Get the `time.monotonic` deadline of an expiry option.
+
+    Args:
+        unit: EX, PX, EXAT or PXAT
+        value: Relative or Unix time, in seconds or milliseconds
+
+    Returns:
+        Deadline of the key
+    """
+    seconds = value / 1000 if unit.startswith(b"P") else float(value)
+    if unit.endswith(b"AT"):
+        seconds -= time.time()
+    return time.monotonic() + seconds
+
+
+class SortedSet:
+    """Members of a sorted set with their scores.
+
+    The members are only sorted when the set is read after a change.
+    """
+
+    __slots__ = ("scores", "_ordered", "_ordered_scores")
+
+    def __init__(self) -> None:
+        """Initialize an empty sorted set."""
+        self.scores: dict[bytes, float] = {}
+        self._ordered: list[tuple[float, bytes]] | None = None
+        # scores of the ordered members, to bisect them
+        self._ordered_scores: list[float] = []
+
+    def __len__(self) -> int:
+        """Get the number of members."""
+        return len(self.scores)
+
+    def add(self, member: bytes, score: float) -> None:
+        """Add a member or update its score.
+
+        Args:
+            member: Member
+            score: Score
+        """
+        self.scores[member] = score
+        self._ordered = None
+
+    def remove(self, member: bytes) -> bool:
+        """Remove a member.
+
+        Args:
+            member: Member
+
+        Returns:
+            True if the member was in the set
+        """
+        if self.scores.pop(member, None) is None:
+            return False
+        self._ordered = None
+        return True
+
+    def ordered(self) -> list[tuple[float, bytes]]:
+        """Get the members ordered by score, then lexicographically.
+
+        Returns:
+            List of (score, member) tuples
+        """
+        if self._ordered is None:
+            self._ordered = sorted((s, m) for m, s in self.scores.items())
+            self._ordered_scores = [s for s, _ in self._ordered]
+        return self._ordered
+
+    def score_range(self, low: tuple[float, bool], high: tuple[float, bool]) -> slice:
+        """Get the slice of the ordered members within a range of scores.
+
+        Args:
+            low: Lower bound, as returned by `_score_bound`
+            high: Upper bound
+
+        Returns:
+            Slice of the list returned by `ordered`
+        """
+        self.ordered()
+        (low_score, low_exclusive), (high_score, high_exclusive) = low, high
+        bisect_low = bisect_right if low_exclusive else bisect_left
+        bisect_high = bisect_left if high_exclusive else bisect_right
+        start = bisect_low(self._ordered_scores, low_score)
+        return slice(start, max(start, bisect_high(self._ordered_scores, high_score)))
+
+
+_TYPE_NAMES = {
+    bytes: b"string",
+    deque: b"list",
+    dict: b"hash",
+    set: b"set",
+    SortedSet: b"zset",
+}
+
+
+class Database:
+    """Keys of a logical database of the stateful engine.
+
+    Keys with a TTL are expired lazily, when they are looked up or listed.
+    """
+
+    max_scans: int = 1024
+
+    def __init__(self) -> None:
+        """Initialize an empty database."""
+        self.data: dict[bytes, Any] = {}
+        self.expires: dict[bytes, float] = {}
+        # snapshots of the keys iterated by SCAN, and the position reached,
+        # by cursor
+        self.scans: dict[int, tuple[list[bytes], int]] = {}
+        self.cursors = count(1)
+
+    def get(self, key: bytes, kind: type | None = None) -> Any:
+        """Get the value of a key.
+
+        Args:
+            key: Key
+            kind: Expected type of the value, if any
+
+        Returns:
+            Value, None if the key does not exist or has expired
+
+        Raises:
+            _ReplyError: If the value is not of the expected type
+        """
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.delete(key)
+            return None
+        value = self.data.get(key)
+        if kind is not None and value is not None and type(value) is not kind:
+            raise _ReplyError(WRONGTYPE)
+        return value
+
+    def get_or_create(self, key: bytes, kind: type) -> Any:
+        """Get the value of a key, creating an empty one if needed.
+
+        Args:
+            key: Key
+            kind: Type of the value
+
+        Returns:
+            Value
+        """
+        value = self.get(key, kind)
+        if value is None:
+            value = self.data[key] = kind()
+        return value
+
+    def set(self, key: bytes, value: Any, keep_ttl: bool = False) -> None:
+        """Set the value of a key.
+
+        Args:
+            key: Key
+            value: Value
+            keep_ttl: Keep the expiry of the previous value
+        """
+        self.data[key] = value
+        if not keep_ttl:
+            self.expires.pop(key, None)
+
+    def delete(self, key: bytes) -> bool:
+        """Delete a key.
+
+        Args:
+            key: Key
+
+        Returns:
+            True if the key existed
+        """
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+    def discard_if_empty(self, key: bytes, value: Any) -> None:
+        """Delete a key whose container value became empty.
+
+        Args:
+            key: Key
+            value: Value of the key
+        """
+        if not value:
+            self.delete(key)
+
+    def live_keys(self) -> list[bytes]:
+        """Get the keys that did not expire.
+
+        Returns:
+            List of keys
+        """
+        now = time.monotonic()
+        for key in [k for k, deadline in self.expires.items() if deadline <= now]:
+            self.delete(key)
+        return list(self.data)
+
+    def clear(self) -> None:
+        """Delete all the keys."""
+        self.data.clear()
+        self.expires.clear()
+        self.scans.clear()
+
+
+_COMMANDS: dict[bytes, Callable[..., Any]] = {}
+# minimum and maximum (None if unbounded) number of arguments of the commands
+_ARITIES: dict[bytes, tuple[int, int | None]] = {}
+_TRANSACTION_COMMANDS = {b"MULTI", b"EXEC", b"DISCARD", b"WATCH", b"UNWATCH"}
+
+
+def _command(
+    *names: str, minimum: int | None = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Register a method of StatefulEntry as the handler of commands.
+
+    The number of arguments the commands accept is the one of the handler.
+
+    Args:
+        *names: Names of the commands
+        minimum: Minimum number of arguments, if the handler needs more
+            variable arguments than none
+
+    Returns:
+        Decorator
+    """
+
+    def register(handler: Callable[..., Any]) -> Callable[..., Any]:
+        parameters = list(inspect.signature(handler).parameters.values())[1:]
+        positional = [p for p in parameters if p.kind is p.POSITIONAL_OR_KEYWORD]
+        required = sum(p.default is p.empty for p in positional)
+        variable = any(p.kind is p.VAR_POSITIONAL for p in parameters)
+        arity = (
+            required if minimum is None else minimum,
+            None if variable else len(positional),
+        )
+        for name in names:
+            _COMMANDS[name.encode()] = handler
+            _ARITIES[name.encode()] = arity
+        return handler
+
+    return register
+
+
+class StatefulEntry(MocketEntry):
+    """Redis entry keeping the data written by the commands it serves.
+
+    It answers any RESP command sent to its address, unless an `Entry`
+    registered before it matches, running a subset of the Redis commands
+    against in-memory strings, lists, hashes, sets and sorted sets. The
+    commands of a pipeline are dispatched one by one, so that such entries
+    keep answering theirs.
+    """
+
+    request_cls = Request
+
+    def __init__(self, addr: Address | None = None) -> None:
+        """Initialize an empty stateful entry.
+
+        Args:
+            addr: (host, port) tuple or None for default
+        """
+        super().__init__(addr or ("localhost", 6379), [OK])
+        self.databases: defaultdict[int, Database] = defaultdict(Database)
+        self.db = self.databases[0]
+        self._transaction: list[tuple[bytes, ...]] | None = None
+        # whether a command was rejected while queueing the transaction
+        self._transaction_failed = False
+        self._replies: deque[bytes] = deque()
+        self._pipeline: list[MocketEntry] | None = None
+        self.protocol = 2
+
+    @classmethod
+    def register(cls, addr: Address | None = None) -> StatefulEntry:
+        """Register a stateful entry.
+
+        Args:
+            addr: (host, port) tuple or None for default
+
+        Returns:
+            The registered entry, e.g. to run commands with `execute`
+        """
+        entry = cls(addr)
+        Mocket.register(entry)
+        return entry
+
+    @staticmethod
+    def _parse(data: bytes) -> list[tuple[bytes, list[bytes]]]:
+        """Parse the commands of a payload.
+
+        The result for the last payload is memoized in the Mocket state.
+
+        Args:
+            data: Raw Redis data
+
+        Returns:
+            List of (command, arguments) tuples, empty for unknown data
+        """
+        memo = Mocket._memo
+        last = getattr(memo, "redis_commands", None)
+        if last is not None and last[0] is data:
+            return last[1]  # type: ignore[no-any-return]
+        commands = split_commands(data) if isinstance(data, bytes) else None
+        parsed = [(command, parse_command(command)) for command in commands or ()]
+        memo.redis_commands = (data, parsed)
+        return parsed
+
+    def can_handle(self, data: bytes) -> bool:
+        """Check if the data is made of RESP commands.
+
+        Args:
+            data: Raw Redis data
+
+        Returns:
+            True if this entry, or the entries of its commands, can run them
+        """
+        parsed = self._parse(data)
+        if len(parsed) < 2:
+            return bool(parsed)
+        commands = [command for command, _ in parsed]
+        return _get_pipeline(self.location, data, commands) is not None
+
+    def collect(self, data: bytes) -> None:
+        """Collect the request data and run its command.
+
+        The commands of a pipeline are collected by their own entries.
+
+        Args:
+            data: Raw Redis data
+        """
+        parsed = self._parse(data)
+        if len(parsed) < 2:
+            for command, args in parsed:
+                super().collect(command)
+                self._replies.append(self.execute(*args))
+            return
+
+        commands = [command for command, _ in parsed]
+        pipeline = _get_pipeline(self.location, data, commands)
+        assert pipeline is not None
+        for entry, command in zip(pipeline, commands):
+            entry.collect(command)
+        self._pipeline = pipeline
+
+    def get_response_segments(self) -> tuple[bytes, ...]:
+        """Get the reply to the command collected, or the ones of a pipeline.
+
+        Returns:
+            Tuple of replies, in the order of the commands
+        """
+        pipeline, self._pipeline = self._pipeline, None
+        if pipeline is not None:
+            return tuple(
+                chain.from_iterable(entry.get_response_segments() for entry in pipeline)
+            )
+        self._next_response()
+        return (self._replies.popleft(),) if self._replies else ()
+
+    def get_response(self) -> bytes:
+        """Get the replies to the commands collected.
+
+        Returns:
+            Replies as bytes
+        """
+        return b"".join(self.get_response_segments())
+
+    def execute(self, *args: str | bytes) -> Redisizer:
+        """Run a command.
+
+        Args:
+            *args: Command name and arguments
+
+        Returns:
+            RESP encoded reply
+        """
+        arguments = tuple(encode_to_bytes(arg) for arg in args)
+        name = arguments[0].upper() if arguments else b""
+        handler = _COMMANDS.get(name)
+        if handler is None:
+            return self._reject(f"ERR unknown command '{decode_from_bytes(name)}'")
+        minimum, maximum = _ARITIES[name]
+        given = len(arguments) - 1
+        if given < minimum or (maximum is not None and given > maximum):
+            return self._reject(str(_wrong_arity(name)))
+        if self._transaction is not None and name not in _TRANSACTION_COMMANDS:
+            self._transaction.append(arguments)
+            return QUEUED
+        try:
+            return Redisizer.encode(handler(self, *arguments[1:]), self.protocol == 3)
+        except _ReplyError as e:
+            return ERROR(str(e))
+
+    def _reject(self, error: str) -> Redisizer:
+        """Reply to a command that can't be run, e.g. an unknown one.
+
+        Args:
+            error: Error message
+
+        Returns:
+            RESP encoded error, a transaction being queued gets aborted by EXEC
+        """
+        if self._transaction is not None:
+            self._transaction_failed = True
+        return ERROR(error)
+
+    # connection and server
+
+    @_command("PING")
+    def _ping(self, message: bytes | None = None) -> Any:
+        """PING [message]"""
+        return Redisizer.command("PONG") if message is None else message
+
+    @_command("ECHO")
+    def _echo(self, message: bytes) -> bytes:
+        """ECHO message"""
+        return message
+
+    @_command("SELECT")
+    def _select(self, index: bytes) -> Redisizer:
+        """SELECT index"""
+        self.db = self.databases[_int(index)]
+        return OK
+
+    @_command("CLIENT")
+    def _client(self, subcommand: bytes, *args: bytes) -> Redisizer:
+        """CLIENT SETINFO | SETNAME ..."""
+        if subcommand.upper() not in (b"SETINFO", b"SETNAME"):
+            raise _ReplyError(
+                f"ERR unknown subcommand '{decode_from_bytes(subcommand)}'"
+            )
+        return OK
+
+    @_command("HELLO")
+    def _hello(self, protocol: bytes | None = None, *options: bytes) -> Any:
+        """HELLO [protover [AUTH username password] [SETNAME clientname]]"""
+        if protocol is not None:
+            if protocol not in (b"2", b"3"):
+                raise _ReplyError("NOPROTO unsupported protocol version")
+            self.protocol = int(protocol)
+        return {
+            "server": "redis",
+            "version": "7.4.0",
+            "proto": self.protocol,
+            "id": 1,
+            "mode": "standalone",
+            "role": "master",
+            "modules": [],
+        }
+
+    @_command("DBSIZE")
+    def _dbsize(self) -> int:
+        """DBSIZE"""
+        return len(self.db.live_keys())
+
+    @_command("FLUSHDB")
+    def _flushdb(self, *options: bytes) -> Redisizer:
+        """FLUSHDB [ASYNC | SYNC]"""
+        self.db.clear()
+        return OK
+
+    @_command("FLUSHALL")
+    def _flushall(self, *options: bytes) -> Redisizer:
+        """FLUSHALL [ASYNC | SYNC]"""
+        for db in self.databases.values():
+            db.clear()
+        return OK
+
+    # transactions
+
+    @_command("MULTI")
+    def _multi(self) -> Redisizer:
+        """MULTI"""
+        if self._transaction is not None:
+            raise _ReplyError("ERR MULTI calls can not be nested")
+        self._transaction = []
+        self._transaction_failed = False
+        return OK
+
+    @_command("EXEC")
+    def _exec(self) -> list[Redisizer]:
+        """EXEC"""
+        if self._transaction is None:
+            raise _ReplyError("ERR EXEC without MULTI")
+        commands, self._transaction = self._transaction, None
+        if self._transaction_failed:
+            raise _ReplyError(
+                "EXECABORT Transaction discarded because of previous errors."
+            )
+        return [self.execute(*args) for args in commands]
+
+    @_command("DISCARD")
+    def _discard(self) -> Redisizer:
+        """DISCARD"""
+        if self._transaction is None:
+            raise _ReplyError("ERR DISCARD without MULTI")
+        self._transaction = None
+        return OK
+
+    @_command("WATCH")
+    def _watch(self, key: bytes, *keys: bytes) -> Redisizer:
+        """WATCH key [key ...], keys are never modified by other clients"""
+        return OK
+
+    @_command("UNWATCH")
+    def _unwatch(self) -> Redisizer:
+        """UNWATCH"""
+        return OK
+
+    # keys
+
+    @_command("DEL", "UNLINK")
+    def _del(self, key: bytes, *keys: bytes) -> int:
+        """DEL key [key ...]"""
+        db = self.db
+        return sum(db.get(k) is not None and db.delete(k) for k in (key, *keys))
+
+    @_command("EXISTS")
+    def _exists(self, key: bytes, *keys: bytes) -> int:
+        """EXISTS key [key ...]"""
+        db = self.db
+        return sum(db.get(k) is not None for k in (key, *keys))
+
+    @_command("TYPE")
+    def _type(self, key: bytes) -> Redisizer:
+        """TYPE key"""
+        value = self.db.get(key)
+        name = b"none" if value is None else _TYPE_NAMES[type(value)]
+        return Redisizer(b"+%s\r\n" % name)
+
+    @_command("RENAME")
+    def _rename(self, key: bytes, new_key: bytes) -> Redisizer:
+        """RENAME key newkey"""
+        db = self.db
+        value = db.get(key)
+        if value is None:
+            raise _ReplyError("ERR no such key")
+        deadline = db.expires.get(key)
+        db.delete(key)
+        db.set(new_key, value)
+        if deadline is not None:
+            db.expires[new_key] = deadline
+        return OK
+
+    @_command("KEYS")
+    def _keys(self, pattern: bytes) -> list[bytes]:
+        """KEYS pattern"""
+        return [key for key in self.db.live_keys() if _match(pattern, key)]
+
+    @_command("SCAN")
+    def _scan(self, cursor: bytes, *options: bytes) -> list[Any]:
+        """SCAN cursor [MATCH pattern] [COUNT count] [TYPE type]"""
+        cursor_id = _int(cursor)
+        pattern = kind = None
+        count = 10
+        arguments = iter(options)
+        for option in arguments:
+            value = next(arguments, None)
+            if value is None:
+                raise _ReplyError("ERR syntax error")
+            option = option.upper()
+            if option == b"MATCH":
+                pattern = value
+            elif option == b"COUNT":
+                count = max(_int(value), 1)
+            elif option == b"TYPE":
+                kind = value.lower()
+            else:
+                raise _ReplyError("ERR syntax error")
+
+        db = self.db
+        if cursor_id == 0:
+            # keys are iterated from a snapshot taken at the first call
+            snapshot, position = db.live_keys(), 0
+        else:
+            # unknown cursors end the iteration
+            snapshot, position = db.scans.get(cursor_id, ([], 0))
+        end = position + count
+        keys = []
+        for key in islice(snapshot, position, end):
+            value = db.get(key)
+            if (
+                value is not None
+                and (pattern is None or _match(pattern, key))
+                and (kind is None or _TYPE_NAMES[type(value)] == kind)
+            ):
+                keys.append(key)
+        if end >= len(snapshot):
+            return [b"0", keys]
+        cursor_id = next(db.cursors)
+        db.scans[cursor_id] = (snapshot, end)
+        if len(db.scans) > db.max_scans:
+            # drop the oldest iteration
+            del db.scans[next(iter(db.scans))]
+        return [b"%d" % cursor_id, keys]
+
+    @_command("EXPIRE")
+    def _expire(self, key: bytes, seconds: bytes, *options: bytes) -> int:
+        """EXPIRE key seconds [NX | XX | GT | LT]"""
+        return self._set_deadline(key, b"EX", seconds, options)
+
+    @_command("PEXPIRE")
+    def _pexpire(self, key: bytes, milliseconds: bytes, *options: bytes) -> int:
+        """PEXPIRE key milliseconds [NX | XX | GT | LT]"""
+        return self._set_deadline(key, b"PX", milliseconds, options)
+
+    @_command("EXPIREAT")
+    def _expireat(self, key: bytes, timestamp: bytes, *options: bytes) -> int:
+        """EXPIREAT key unix-time-seconds [NX | XX | GT | LT]"""
+        return self._set_deadline(key, b"EXAT", timestamp, options)
+
+    @_command("PEXPIREAT")
+    def _pexpireat(self, key: bytes, timestamp: bytes, *options: bytes) -> int:
+        """PEXPIREAT key unix-time-milliseconds [NX | XX | GT | LT]"""
+        return self._set_deadline(key, b"PXAT", timestamp, options)
+
+    def _set_deadline(
+        self, key: bytes, unit: bytes, value: bytes, options: tuple[bytes, ...]
+    ) -> int:
+        """Set the expiry of a key.
+
+        Args:
+            key: Key
+            unit: EX, PX, EXAT or PXAT
+            value: Argument of the command
+            options: NX, XX, GT or LT
+
+        Returns:
+            1 if the expiry was set, 0 otherwise
+
+        Raises:
+            _ReplyError: If the options are unknown or not compatible
+        """
+        flags = set()
+        for option in options:
+            if option.upper() not in (b"NX", b"XX", b"GT", b"LT"):
+                raise _ReplyError(f"ERR Unsupported option {decode_from_bytes(option)}")
+            flags.add(option.upper())
+        if b"NX" in flags and len(flags) > 1:
+            raise _ReplyError(
+                "ERR NX and XX, GT or LT options at the same time are not compatible"
+            )
+        if {b"GT", b"LT"} <= flags:
+            raise _ReplyError(
+                "ERR GT and LT options at the same time are not compatible"
+            )
+
+        deadline = _deadline(unit, _int(value))
+        db = self.db
+        if db.get(key) is None:
+            return 0
+        # keys without expiry never expire, as if their TTL was infinite
+        current = db.expires.get(key)
+        if (
+            (b"NX" in flags and current is not None)
+            or (b"XX" in flags and current is None)
+            or (b"GT" in flags and (current is None or deadline <= current))
+            or (b"LT" in flags and current is not None and deadline >= current)
+        ):
+            return 0
+        db.expires[key] = deadline
+        return 1
+
+    @_command("PERSIST")
+    def _persist(self, key: bytes) -> int:
+        """PERSIST key"""
+        db = self.db
+        if db.get(key) is None:
+            return 0
+        return int(db.expires.pop(key, None) is not None)
+
+    @_command("TTL")
+    def _ttl(self, key: bytes) -> int:
+        """TTL key"""
+        return self._get_ttl(key, 1)
+
+    @_command("PTTL")
+    def _pttl(self, key: bytes) -> int:
+        """PTTL key"""
+        return self._get_ttl(key, 1000)
+
+    def _get_ttl(self, key: bytes, scale: int) -> int:
+        """Get the time to live of a key.
+
+        Args:
+            key: Key
+            scale: 1 for seconds, 1000 for milliseconds
+
+        Returns:
+            Time to live, -1 without expiry, -2 if the key does not exist
+        """
+        db = self.db
+        if db.get(key) is None:
+            return -2
+        deadline = db.expires.get(key)
+        if deadline is None:
+            return -1
+        return max(round((deadline - time.monotonic()) * scale), 0)
+
+    # strings
+
+    @_command("GET")
+    def _get(self, key: bytes) -> bytes | None:
+        """GET key"""
+        return self.db.get(key, bytes)  # type: ignore[no-any-return]
+
+    @_command("SET")
+    def _set(self, key: bytes, value: bytes, *options: bytes) -> Any:
+        """SET key value [NX | XX] [GET] [EX | PX | EXAT | PXAT time | KEEPTTL]"""
+        condition = deadline = None
+        get = keep_ttl = False
+        arguments = iter(options)
+        for option in arguments:
+            option = option.upper()
+            if option in (b"NX", b"XX"):
+                condition = option
+            elif option == b"GET":
+                get = True
+            elif option == b"KEEPTTL":
+                keep_ttl = True
+            elif option in (b"EX", b"PX", b"EXAT", b"PXAT"):
+                deadline = _deadline(option, _int(next(arguments, b"")))
+            else:
+                raise _ReplyError("ERR syntax error")
+
+        db = self.db
+        previous = db.get(key, bytes if get else None)
+        exists = previous is not None
+        if (condition == b"NX" and exists) or (condition == b"XX" and not exists):
+            return previous if get else None
+        db.set(key, value, keep_ttl=keep_ttl)
+        if deadline is not None:
+            db.expires[key] = deadline
+        return previous if get else OK
+
+    @_command("SETNX")
+    def _setnx(self, key: bytes, value: bytes) -> int:
+        """SETNX key value"""
+        return int(self._set(key, value, b"NX") is OK)
+
+    @_command("SETEX")
+    def _setex(self, key: bytes, seconds: bytes, value: bytes) -> Redisizer:
+        """SETEX key seconds value"""
+        return self._set(key, value, b"EX", seconds)  # type: ignore[no-any-return]
+
+    @_command("PSETEX")
+    def _psetex(self, key: bytes, milliseconds: bytes, value: bytes) -> Redisizer:
+        """PSETEX key milliseconds value"""
+        return self._set(key, value, b"PX", milliseconds)  # type: ignore[no-any-return]
+
+    @_command("GETDEL")
+    def _getdel(self, key: bytes) -> bytes | None:
+        """GETDEL key"""
+        value = self.db.get(key, bytes)
+        if value is not None:
+            self.db.delete(key)
+        return value  # type: ignore[no-any-return]
+
+    @_command("MGET")
+    def _mget(self, key: bytes, *keys: bytes) -> list[bytes | None]:
+        """MGET key [key ...]"""
+        db = self.db
+        values = (db.get(k) for k in (key, *keys))
+        return [v if type(v) is bytes else None for v in values]
+
+    @_command("MSET")
+    def _mset(self, key: bytes, value: bytes, *pairs: bytes) -> Redisizer:
+        """MSET key value [key value ...]"""
+        if len(pairs) % 2:
+            raise _wrong_arity(b"MSET")
+        db = self.db
+        arguments = (key, value, *pairs)
+        for k, v in zip(arguments[::2], arguments[1::2]):
+            db.set(k, v)
+        return OK
+
+    @_command("INCR")
+    def _incr(self, key: bytes) -> int:
+        """INCR key"""
+        return self._increment(key, 1)
+
+    @_command("INCRBY")
+    def _incrby(self, key: bytes, increment: bytes) -> int:
+        """INCRBY key increment"""
+        return self._increment(key, _int(increment))
+
+    @_command("DECR")
+    def _decr(self, key: bytes) -> int:
+        """DECR key"""
+        return self._increment(key, -1)
+
+    @_command("DECRBY")
+    def _decrby(self, key: bytes, decrement: bytes) -> int:
+        """DECRBY key decrement"""
+        return self._increment(key, -_int(decrement))
+
+    def _increment(self, key: bytes, increment: int) -> int:
+        """Increment the integer value of a key, keeping its expiry.
+
+        Args:
+            key: Key
+            increment: Increment
+
+        Returns:
+            New value
+        """
+        db = self.db
+        value = _int(db.get(key, bytes) or b"0") + increment
+        db.set(key, b"%d" % value, keep_ttl=True)
+        return value
+
+    @_command("APPEND")
+    def _append(self, key: bytes, value: bytes) -> int:
+        """APPEND key value"""
+        db = self.db
+        value = (db.get(key, bytes) or b"") + value
+        db.set(key, value, keep_ttl=True)
+        return len(value)
+
+    @_command("STRLEN")
+    def _strlen(self, key: bytes) -> int:
+        """STRLEN key"""
+        return len(self.db.get(key, bytes) or b"")
+
+    # hashes
+
+    @_command("HSET", "HMSET")
+    def _hset(self, key: bytes, field: bytes, value: bytes, *pairs: bytes) -> Any:
+        """HSET key field value [field value ...]"""
+        if len(pairs) % 2:
+            raise _wrong_arity(b"HSET")
+        hash_ = self.db.get_or_create(key, dict)
+        size = len(hash_)
+        arguments = (field, value, *pairs)
+        hash_.update(zip(arguments[::2], arguments[1::2]))
+        return len(hash_) - size
+
+    @_command("HSETNX")
+    def _hsetnx(self, key: bytes, field: bytes, value: bytes) -> int:
+        """HSETNX key field value"""
+        hash_ = self.db.get_or_create(key, dict)
+        if field in hash_:
+            return 0
+        hash_[field] = value
+        return 1
+
+    @_command("HGET")
+    def _hget(self, key: bytes, field: bytes) -> bytes | None:
+        """HGET key field"""
+        return (self.db.get(key, dict) or {}).get(field)
+
+    @_command("HMGET")
+    def _hmget(self, key: bytes, field: bytes, *fields: bytes) -> list[bytes | None]:
+        """HMGET key field [field ...]"""
+        hash_ = self.db.get(key, dict) or {}
+        return [hash_.get(f) for f in (field, *fields)]
+
+    @_command("HGETALL")
+    def _hgetall(self, key: bytes) -> dict[bytes, bytes]:
+        """HGETALL key"""
+        return self.db.get(key, dict) or {}  # type: ignore[no-any-return]
+
+    @_command("HKEYS")
+    def _hkeys(self, key: bytes) -> list[bytes]:
+        """HKEYS key"""
+        return list(self.db.get(key, dict) or ())
+
+    @_command("HVALS")
+    def _hvals(self, key: bytes) -> list[bytes]:
+        """HVALS key"""
+        return list((self.db.get(key, dict) or {}).values())
+
+    @_command("HLEN")
+    def _hlen(self, key: bytes) -> int:
+        """HLEN key"""
+        return len(self.db.get(key, dict) or ())
+
+    @_command("HEXISTS")
+    def _hexists(self, key: bytes, field: bytes) -> int:
+        """HEXISTS key field"""
+        return int(field in (self.db.get(key, dict) or ()))
+
+    @_command("HDEL")
+    def _hdel(self, key: bytes, field: bytes, *fields: bytes) -> int:
+        """HDEL key field [field ...]"""
+        db = self.db
+        hash_ = db.get(key, dict)
+        if hash_ is None:
+            return 0
+        deleted = sum(hash_.pop(f, None) is not None for f in (field, *fields))
+        db.discard_if_empty(key, hash_)
+        return deleted
+
+    @_command("HINCRBY")
+    def _hincrby(self, key: bytes, field: bytes, increment: bytes) -> int:
+        """HINCRBY key field increment"""
+        hash_ = self.db.get_or_create(key, dict)
+        increment_value = _int(increment)
+        try:
+            value = _int(hash_.get(field, b"0"))
+        except _ReplyError:
+            raise _ReplyError("ERR hash value is not an integer") from None
+        value += increment_value
+        hash_[field] = b"%d" % value
+        return value
+
+    # lists
+
+    @_command("LPUSH")
+    def _lpush(self, key: bytes, element: bytes, *elements: bytes) -> int:
+        """LPUSH key element [element ...]"""
+        list_ = self.db.get_or_create(key, deque)
+        list_.extendleft((element, *elements))
+        return len(list_)
+
+    @_command("RPUSH")
+    def _rpush(self, key: bytes, element: bytes, *elements: bytes) -> int:
+        """RPUSH key element [element ...]"""
+        list_ = self.db.get_or_create(key, deque)
+        list_.extend((element, *elements))
+        return len(list_)
+
+    @_command("LPOP")
+    def _lpop(self, key: bytes, count: bytes | None = None) -> Any:
+        """LPOP key [count]"""
+        return self._pop(key, count, left=True)
+
+    @_command("RPOP")
+    def _rpop(self, key: bytes, count: bytes | None = None) -> Any:
+        """RPOP key [count]"""
+        return self._pop(key, count, left=False)
+
+    def _pop(self, key: bytes, count: bytes | None, left: bool) -> Any:
+        """Remove and get elements from one end of a list.
+
+        Args:
+            key: Key
+            count: Number of elements, None for a single one
+            left: Pop from the head of the list
+
+        Returns:
+            Element, list of elements or a null (array) if the list does
+            not exist
+        """
+        db = self.db
+        list_ = db.get(key, deque)
+        if list_ is None:
+            if count is None or self.protocol == 3:
+                return None
+            return NULL_ARRAY
+        pop = list_.popleft if left else list_.pop
+        if count is None:
+            elements: Any = pop()
+        else:
+            elements = [pop() for _ in range(min(_int(count), len(list_)))]
+        db.discard_if_empty(key, list_)
+        return elements
+
+    @_command("LLEN")
+    def _llen(self, key: bytes) -> int:
+        """LLEN key"""
+        return len(self.db.get(key, deque) or ())
+
+    @_command("LRANGE")
+    def _lrange(self, key: bytes, start: bytes, stop: bytes) -> list[bytes]:
+        """LRANGE key start stop"""
+        list_ = self.db.get(key, deque) or deque()
+        index_range = _index_range(len(list_), _int(start), _int(stop))
+        return list(islice(list_, index_range.start, index_range.stop))
+
+    @_command("LINDEX")
+    def _lindex(self, key: bytes, index: bytes) -> bytes | None:
+        """LINDEX key index"""
+        list_ = self.db.get(key, deque) or deque()
+        try:
+            return list_[_int(index)]  # type: ignore[no-any-return]
+        except IndexError:
+            return None
+
+    # sets
+
+    @_command("SADD")
+    def _sadd(self, key: bytes, member: bytes, *members: bytes) -> int:
+        """SADD key member [member ...]"""
+        set_ = self.db.get_or_create(key, set)
+        size = len(set_)
+        set_.update((member, *members))
+        return len(set_) - size
+
+    @_command("SREM")
+    def _srem(self, key: bytes, member: bytes, *members: bytes) -> int:
+        """SREM key member [member ...]"""
+        db = self.db
+        set_ = db.get(key, set)
+        if set_ is None:
+            return 0
+        size = len(set_)
+        set_.difference_update((member, *members))
+        db.discard_if_empty(key, set_)
+        return size - len(set_)
+
+    @_command("SMEMBERS")
+    def _smembers(self, key: bytes) -> set[bytes]:
+        """SMEMBERS key"""
+        return self.db.get(key, set) or set()  # type: ignore[no-any-return]
+
+    @_command("SISMEMBER")
+    def _sismember(self, key: bytes, member: bytes) -> int:
+        """SISMEMBER key member"""
+        return int(member in (self.db.get(key, set) or ()))
+
+    @_command("SCARD")
+    def _scard(self, key: bytes) -> int:
+        """SCARD key"""
+        return len(self.db.get(key, set) or ())
+
+    # sorted sets
+
+    @_command("ZADD", minimum=3)
+    def _zadd(self, key: bytes, *arguments: bytes) -> Any:
+        """ZADD key [NX | XX] [GT | LT] [CH] [INCR] score member [...]"""
+        flags = set()
+        while arguments and arguments[0].upper() in _ZADD_FLAGS:
+            flags.add(arguments[0].upper())
+            arguments = arguments[1:]
+        if not arguments or len(arguments) % 2:
+            raise _ReplyError("ERR syntax error")
+        pairs = [(_float(s), m) for s, m in zip(arguments[::2], arguments[1::2])]
+
+        db = self.db
+        zset = db.get_or_create(key, SortedSet)
+        added = changed = 0
+        score = None
+        for score, member in pairs:  # noqa: B007
+            current = zset.scores.get(member)
+            if current is None:
+                if b"XX" in flags:
+                    score = None
+                    continue
+                added += 1
+            else:
+                if b"INCR" in flags:
+                    score += current
+                if (
+                    b"NX" in flags
+                    or (b"GT" in flags and score <= current)
+                    or (b"LT" in flags and score >= current)
+                ):
+                    score = None
+                    continue
+                changed += score != current
+            zset.add(member, score)
+        db.discard_if_empty(key, zset)
+
+        if b"INCR" in flags:
+            return score
+        return added + changed if b"CH" in flags else added
+
+    @_command("ZINCRBY")
+    def _zincrby(self, key: bytes, increment: bytes, member: bytes) -> float:
+        """ZINCRBY key increment member"""
+        zset = self.db.get_or_create(key, SortedSet)
+        score = zset.scores.get(member, 0.0) + _float(increment)
+        zset.add(member, score)
+        return score
+
+    @_command("ZREM")
+    def _zrem(self, key: bytes, member: bytes, *members: bytes) -> int:
+        """ZREM key member [member ...]"""
+        db = self.db
+        zset = db.get(key, SortedSet)
+        if zset is None:
+            return 0
+        removed = sum(zset.remove(m) for m in (member, *members))
+        db.discard_if_empty(key, zset)
+        return removed
+
+    @_command("ZSCORE")
+    def _zscore(self, key: bytes, member: bytes) -> float | None:
+        """ZSCORE key member"""
+        zset = self.db.get(key, SortedSet)
+        return None if zset is None else zset.scores.get(member)
+
+    @_command("ZCARD")
+    def _zcard(self, key: bytes) -> int:
+        """ZCARD key"""
+        return len(self.db.get(key, SortedSet) or ())
+
+    @_command("ZRANK")
+    def _zrank(self, key: bytes, member: bytes) -> int | None:
+        """ZRANK key member"""
+        zset = self.db.get(key, SortedSet)
+        score = None if zset is None else zset.scores.get(member)
+        if score is None:
+            return None
+        return bisect_left(zset.ordered(), (score, member))
+
+    @_command("ZRANGE")
+    def _zrange(
+        self, key: bytes, start: bytes, stop: bytes, *options: bytes
+    ) -> list[Any]:
+        """ZRANGE key start stop [BYSCORE] [REV] [LIMIT offset count] [WITHSCORES]"""
+        by_score = rev = with_scores = False
+        limit = None
+        arguments = iter(options)
+        for option in arguments:
+            option = option.upper()
+            if option == b"BYSCORE":
+                by_score = True
+            elif option == b"REV":
+                rev = True
+            elif option == b"WITHSCORES":
+                with_scores = True
+            elif option == b"LIMIT":
+                offset, count = _int(next(arguments, b"")), _int(next(arguments, b""))
+                limit = slice(offset, None if count < 0 else offset + count)
+            else:
+                raise _ReplyError("ERR syntax error")
+
+        # the range is parsed first, so that it gets validated for any key
+        if by_score:
+            low, high = (stop, start) if rev else (start, stop)
+            bounds = _score_bound(low), _score_bound(high)
+        elif limit is not None:
+            raise _ReplyError(
+                "ERR syntax error, LIMIT is only supported in combination "
+                "with either BYSCORE or BYLEX"
+            )
+        else:
+            indexes = _int(start), _int(stop)
+
+        zset = self.db.get(key, SortedSet)
+        if zset is None:
+            return []
+        if by_score:
+            members = zset.ordered()[zset.score_range(*bounds)]
+            if rev:
+                members = members[::-1]
+            if limit is not None:
+                members = members[limit]
+        else:
+            members = zset.ordered()[::-1] if rev else zset.ordered()
+            members = members[_index_range(len(members), *indexes)]
+        if not with_scores:
+            return [m for _, m in members]
+        if self.protocol == 3:
+            return [[m, s] for s, m in members]
+        return list(chain.from_iterable((m, s) for s, m in members))
+
+    @_command("ZRANGEBYSCORE")
+    def _zrangebyscore(
+        self, key: bytes, low: bytes, high: bytes, *options: bytes
+    ) -> list[Any]:
+        """ZRANGEBYSCORE key min max [WITHSCORES] [LIMIT offset count]"""
+        return self._zrange(key, low, high, b"BYSCORE", *options)
+
+    @_command("ZREVRANGE")
+    def _zrevrange(
+        self, key: bytes, start: bytes, stop: bytes, *options: bytes
+    ) -> list[Any]:
+        """ZREVRANGE key start stop [WITHSCORES]"""
+        return self._zrange(key, start, stop, b"REV", *options)
+
+
+_ZADD_FLAGS = {b"NX", b"XX", b"GT", b"LT", b"CH", b"INCR"}
+
+
+def _match(pattern: bytes, key: bytes) -> bool:
+    """Check if a key matches a glob-style pattern.
+
+    Args:
+        pattern: Pattern, e.g. "user:*"
+        key: Key
+
+    Returns:
+        True if the key matches
+    """
+    return fnmatchcase(key.decode("latin-1"), pattern.decode("latin-1"))
@@ -2,25 +2,39 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING
 
 from mocket.exceptions import StrictMocketException
 from mocket.mocket import Mocket
+from mocket.state import get_state
 
 if TYPE_CHECKING:  # pragma: no cover
     from typing import NoReturn
 
 
 class _MocketMode:
-    """Singleton class for managing Mocket's strict mode enforcement."""
+    """Singleton class for managing Mocket's strict mode enforcement.
 
-    __shared_state: ClassVar[dict[str, Any]] = {}
-    STRICT: ClassVar = None
-    STRICT_ALLOWED: ClassVar = None
+    Settings are stored in the MocketState of the current context.
+    """
 
-    def __init__(self) -> None:
-        """Initialize the MocketMode singleton with shared state."""
-        self.__dict__ = self.__shared_state
+    @property
+    def STRICT(self) -> bool | None:
+        """Get whether STRICT mode is active."""
+        return get_state().strict
+
+    @STRICT.setter
+    def STRICT(self, value: bool | None) -> None:
+        get_state().strict = value
+
+    @property
+    def STRICT_ALLOWED(self) -> list | None:
+        """Get the locations allowed in STRICT mode."""
+        return get_state().strict_allowed
+
+    @STRICT_ALLOWED.setter
+    def STRICT_ALLOWED(self, value: list | None) -> None:
+        get_state().strict_allowed = value
 
     def is_allowed(self, location: str | tuple[str, int]) -> bool:
         """Check if a location is allowed to perform real socket calls.
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import atexit
 import contextlib
 import hashlib
 import json
+import mmap
+import os
+import struct
+import weakref
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from mocket.compat import decode_from_bytes, encode_to_bytes
-from mocket.types import Address
+from mocket.types import Address, RequestCanonicalizer
 from mocket.utils import hexdump, hexload
 
 hash_function: Any = hashlib.md5
@@ -26,6 +31,57 @@ with contextlib.suppress(ImportError):
 
     hash_function = xxhash_xxh32
 
+fcntl: Any = None
+
+with contextlib.suppress(ImportError):
+    import fcntl
+
+
+@contextlib.contextmanager
+def _lock(directory: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a directory, shared with other processes.
+
+    The lock is advisory and only taken where fcntl is available.
+
+    Args:
+        directory: Path to the directory
+    """
+    directory.mkdir(exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+# storages alive, whose buffered records get flushed when the interpreter exits
+_storages: weakref.WeakSet[MocketRecordStorage] = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_storages() -> None:
+    """Persist the records buffered by the storages which are still alive."""
+    for storage in list(_storages):
+        with contextlib.suppress(OSError):
+            storage.flush()
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    """Replace the content of a file at once, readers never see it partially.
+
+    Args:
+        path: Path to the file
+        data: New content
+    """
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text(data)
+    os.replace(temp_path, path)
+
 
 def _hash_prepare_request(data: bytes) -> bytes:
     """Prepare request data for hashing by sorting headers.
@@ -66,6 +122,24 @@ def _hash_request_fallback(data: bytes) -> str:
     return hashlib.md5(_data).hexdigest()
 
 
+def _hash_request_signatures(data: bytes) -> tuple[str, str]:
+    """Hash a request with MD5 and with the best available hash function.
+
+    The request gets prepared only once for both hashes.
+
+    Args:
+        data: Raw request data
+
+    Returns:
+        Tuple of (MD5 hex digest, hex digest of the best hash function)
+    """
+    _data = _hash_prepare_request(data)
+    signature_fallback = hashlib.md5(_data).hexdigest()
+    if hash_function is hashlib.md5:
+        return signature_fallback, signature_fallback
+    return signature_fallback, hash_function(_data).hexdigest()
+
+
 @dataclass
 class MocketRecord:
     """A record of a request and its corresponding response."""
@@ -77,22 +151,41 @@ class MocketRecord:
 
 
 class MocketRecordStorage:
-    """Storage for recording and retrieving request/response pairs."""
+    """Storage for recording and retrieving request/response pairs.
+
+    New records are merged into `<namespace>.json` in batches, the file
+    gets rewritten once per flush.
+    """
+
+    signatures_cache_size: int = 256
+    signatures_key_prefix: int = 64
+    flush_every: int = 100
 
-    def __init__(self, directory: Path, namespace: str) -> None:
+    def __init__(
+        self,
+        directory: Path,
+        namespace: str,
+        canonicalizer: RequestCanonicalizer | None = None,
+    ) -> None:
         """Initialize the record storage.
 
         Args:
             directory: Path to directory for storing recordings
             namespace: Namespace for grouping records
+            canonicalizer: Function rewriting requests before hashing them,
+                e.g. to drop volatile headers
         """
         self._directory = directory
         self._namespace = namespace
+        self._canonicalizer = canonicalizer
+        self._signatures: dict[tuple[int, bytes | str, int], tuple[str, str]] = {}
+        self._unsaved = 0
         self._records: defaultdict[Address, defaultdict[str, MocketRecord]] = (
             defaultdict(defaultdict)
         )
 
         self._load()
+        _storages.add(self)
 
     @property
     def directory(self) -> Path:
@@ -121,8 +214,53 @@ class MocketRecordStorage:
         """
         return self._directory / f"{self._namespace}.json"
 
+    @staticmethod
+    def _serialize(record: MocketRecord) -> dict[str, str]:
+        """Serialize a record for storing it as JSON.
+
+        Args:
+            record: MocketRecord instance
+
+        Returns:
+            Dictionary with the request and the hexdump of the response
+        """
+        return dict(
+            request=decode_from_bytes(record.request),
+            response=hexdump(record.response),
+        )
+
+    @staticmethod
+    def _deserialize(host: str, port: int, data: dict[str, str]) -> MocketRecord:
+        """Deserialize a record stored as JSON.
+
+        Args:
+            host: Hostname
+            port: Port number
+            data: Dictionary with the request and the response
+
+        Returns:
+            MocketRecord instance
+        """
+        # NOTE backward-compat
+        try:
+            request_data = hexload(data["request"])
+        except ValueError:
+            request_data = data["request"]
+
+        return MocketRecord(
+            host=host,
+            port=port,
+            request=request_data,
+            response=hexload(data["response"]),
+        )
+
     def _load(self) -> None:
         """Load recordings from disk."""
+        with _lock(self._directory):
+            self._read()
+
+    def _read(self) -> None:
+        """Read recordings from disk, holding the lock."""
         if not self.file.exists():
             return
 
@@ -131,35 +269,52 @@ class MocketRecordStorage:
         for host, port_signature_record in records.items():
             for port, signature_record in port_signature_record.items():
                 for signature, record in signature_record.items():
-                    # NOTE backward-compat
-                    try:
-                        request_data = hexload(record["request"])
-                    except ValueError:
-                        request_data = record["request"]
-
-                    self._records[(host, int(port))][signature] = MocketRecord(
-                        host=host,
-                        port=port,
-                        request=request_data,
-                        response=hexload(record["response"]),
+                    self._records[(host, int(port))][signature] = self._deserialize(
+                        host, port, record
                     )
 
     def _save(self) -> None:
         """Save recordings to disk."""
-        data: dict[str, dict[str, dict[str, dict[str, str]]]] = defaultdict(
-            lambda: defaultdict(defaultdict)
-        )
+        with _lock(self._directory):
+            self._write_json()
+
+    def _write_json(self) -> None:
+        """Merge the recordings into the JSON file, holding the lock.
+
+        Records saved meanwhile by other processes are kept.
+        """
+        data: dict[str, dict[str, dict[str, dict[str, str]]]] = {}
+        if self.file.exists():
+            data = json.loads(self.file.read_text())
         for address, signature_record in self._records.items():
             host, port = address
+            port_records = data.setdefault(host, {}).setdefault(str(port), {})
             for signature, record in signature_record.items():
-                data[host][str(port)][signature] = dict(
-                    request=decode_from_bytes(record.request),
-                    response=hexdump(record.response),
-                )
+                port_records[signature] = self._serialize(record)
+
+        _write_atomic(self.file, json.dumps(data, indent=4, sort_keys=True))
+
+    def _save_record(self, signature: str, record: MocketRecord) -> None:
+        """Count a new record, to be merged into the JSON file.
+
+        Args:
+            signature: Request signature
+            record: MocketRecord instance
+        """
+        self._unsaved += 1
+        if self._unsaved >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Persist the records which have not been saved yet."""
+        if not self._unsaved:
+            return
+
+        self._save()
+        self._unsaved = 0
 
-        json_data = json.dumps(data, indent=4, sort_keys=True)
-        self.file.parent.mkdir(exist_ok=True)
-        self.file.write_text(json_data)
+    def close(self) -> None:
+        """Release the resources held by the storage."""
 
     def get_records(self, address: Address) -> list[MocketRecord]:
         """Get all records for an address.
@@ -182,16 +337,49 @@ class MocketRecordStorage:
         Returns:
             Matching MocketRecord or None
         """
+        request_signature_fallback, request_signature = self.get_signatures(request)
+
         # NOTE for backward-compat
-        request_signature_fallback = _hash_request_fallback(request)
-        if request_signature_fallback in self._records[address]:
-            return self._records[address].get(request_signature_fallback)
+        record = self._find_record(address, request_signature_fallback)
+        if record is not None:
+            return record
+
+        return self._find_record(address, request_signature)
 
-        request_signature = _hash_request(request)
-        if request_signature in self._records[address]:
-            return self._records[address][request_signature]
+    def get_signatures(self, request: bytes) -> tuple[str, str]:
+        """Get the signatures of a request, computing them only once.
 
-        return None
+        Args:
+            request: Request bytes
+
+        Returns:
+            Tuple of (MD5 signature, signature)
+        """
+        data = request if isinstance(request, (bytes, str)) else bytes(request)
+        # not keeping whole requests alive, bytes and str cache their hash
+        key = (len(data), data[: self.signatures_key_prefix], hash(data))
+        signatures = self._signatures.get(key)
+        if signatures is None:
+            if self._canonicalizer is not None:
+                data = self._canonicalizer(encode_to_bytes(data))
+            signatures = _hash_request_signatures(data)
+            if len(self._signatures) >= self.signatures_cache_size:
+                # drop the oldest one
+                del self._signatures[next(iter(self._signatures))]
+            self._signatures[key] = signatures
+        return signatures
+
+    def _find_record(self, address: Address, signature: str) -> MocketRecord | None:
+        """Get the record stored under a signature.
+
+        Args:
+            address: (host, port) tuple
+            signature: Request signature
+
+        Returns:
+            Matching MocketRecord or None
+        """
+        return self._records[address].get(signature)
 
     def put_record(
         self,
@@ -214,12 +402,355 @@ class MocketRecordStorage:
             response=response,
         )
 
+        request_signature_fallback, request_signature = self.get_signatures(request)
+
         # NOTE for backward-compat
-        request_signature_fallback = _hash_request_fallback(request)
-        if request_signature_fallback in self._records[address]:
+        if self._find_record(address, request_signature_fallback) is not None:
             self._records[address][request_signature_fallback] = record
             return
 
-        request_signature = _hash_request(request)
         self._records[address][request_signature] = record
-        self._save()
+        self._save_record(request_signature, record)
+
+
+class MocketJsonLinesRecordStorage(MocketRecordStorage):
+    """Append-only storage writing new records as JSON Lines.
+
+    New records are appended in batches to `<namespace>.jsonl`, without
+    rewriting what is already on disk. Recordings in the JSON format are
+    still loaded, `compact` merges the two files back into the JSON format.
+    """
+
+    flush_every: int = 100
+
+    def __init__(
+        self,
+        directory: Path,
+        namespace: str,
+        canonicalizer: RequestCanonicalizer | None = None,
+    ) -> None:
+        """Initialize the record storage.
+
+        Args:
+            directory: Path to directory for storing recordings
+            namespace: Namespace for grouping records
+            canonicalizer: Function rewriting requests before hashing them
+        """
+        self._pending: list[str] = []
+        super().__init__(
+            directory=directory, namespace=namespace, canonicalizer=canonicalizer
+        )
+
+    @property
+    def journal(self) -> Path:
+        """Get the path to the namespace's JSON Lines file.
+
+        Returns:
+            Path to JSON Lines recording file
+        """
+        return self._directory / f"{self._namespace}.jsonl"
+
+    def _read(self) -> None:
+        """Read recordings from disk, journal entries win."""
+        super()._read()
+
+        if not self.journal.exists():
+            return
+
+        with self.journal.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                host, port = record["host"], int(record["port"])
+                self._records[(host, port)][record["signature"]] = self._deserialize(
+                    host, port, record
+                )
+
+    def _save_record(self, signature: str, record: MocketRecord) -> None:
+        """Buffer a new record, to be appended to the journal.
+
+        Args:
+            signature: Request signature
+            record: MocketRecord instance
+        """
+        self._pending.append(
+            json.dumps(
+                dict(
+                    host=record.host,
+                    port=record.port,
+                    signature=signature,
+                    **self._serialize(record),
+                ),
+                sort_keys=True,
+            )
+        )
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the buffered records to the journal."""
+        if not self._pending:
+            return
+
+        with _lock(self._directory), self.journal.open("a") as f:
+            f.write("\n".join(self._pending) + "\n")
+        self._pending = []
+
+    def compact(self) -> None:
+        """Save all the records in the JSON format and drop the journal."""
+        self._pending = []
+        with _lock(self._directory):
+            # pick up what other processes appended meanwhile
+            self._records.clear()
+            self._read()
+            self._write_json()
+            if self.journal.exists():
+                self.journal.unlink()
+
+
+class MocketBinaryRecordStorage(MocketRecordStorage):
+    """Binary storage with an index, reading responses only when needed.
+
+    `<namespace>.bin` starts with a fixed header pointing to a JSON index,
+    mapping signatures to the offsets of the raw request/response bytes.
+    The file is memory-mapped and a record gets read only when a lookup
+    hits it. Recordings in the JSON format are still loaded.
+
+    New records and the updated index are appended after the current index
+    before the header gets pointed to them, an interrupted write leaves the
+    previous index in place.
+    """
+
+    MAGIC: bytes = b"MOCKETR1"
+    HEADER: struct.Struct = struct.Struct("<8sQ")
+    flush_every: int = 100
+
+    def __init__(
+        self,
+        directory: Path,
+        namespace: str,
+        canonicalizer: RequestCanonicalizer | None = None,
+    ) -> None:
+        """Initialize the record storage.
+
+        Args:
+            directory: Path to directory for storing recordings
+            namespace: Namespace for grouping records
+            canonicalizer: Function rewriting requests before hashing them
+        """
+        self._mmap: mmap.mmap | None = None
+        self._index: defaultdict[Address, dict[str, list[int]]] = defaultdict(dict)
+        self._index_offset = 0
+        self._pending: list[tuple[Address, str, MocketRecord]] = []
+        super().__init__(
+            directory=directory, namespace=namespace, canonicalizer=canonicalizer
+        )
+
+    @property
+    def binary_file(self) -> Path:
+        """Get the path to the namespace's binary file.
+
+        Returns:
+            Path to binary recording file
+        """
+        return self._directory / f"{self._namespace}.bin"
+
+    def _read(self) -> None:
+        """Read the JSON recordings and the index of the binary ones."""
+        super()._read()
+
+        if not self.binary_file.exists():
+            return
+
+        self._open()
+        self._read_index()
+
+    def _read_index(self) -> None:
+        """Merge the index of the memory-mapped binary file into ours."""
+        if self._mmap is None:
+            # empty file
+            return
+
+        magic, self._index_offset = self.HEADER.unpack_from(self._mmap)
+        if magic != self.MAGIC:
+            raise ValueError(f"Not a Mocket recording: {self.binary_file}")
+
+        # the index is ASCII, anything an interrupted write left after it
+        # is ignored
+        index, _ = json.JSONDecoder().raw_decode(
+            self._mmap[self._index_offset :].decode("latin-1")
+        )
+        for host, port_signature_offsets in index.items():
+            for port, signature_offsets in port_signature_offsets.items():
+                self._index[(host, int(port))].update(signature_offsets)
+
+    def _open(self) -> None:
+        """Memory-map the binary file, unless it is empty."""
+        with self.binary_file.open("rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Release the memory-mapped binary file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_record(self, address: Address, offsets: list[int]) -> MocketRecord:
+        """Read a record from the memory-mapped binary file.
+
+        Args:
+            address: (host, port) tuple
+            offsets: Offset and length of the request, then of the response
+
+        Returns:
+            MocketRecord instance
+        """
+        assert self._mmap is not None
+        request_offset, request_length, response_offset, response_length = offsets
+        host, port = address
+        return MocketRecord(
+            host=host,
+            port=port,
+            request=self._mmap[request_offset : request_offset + request_length],
+            response=self._mmap[response_offset : response_offset + response_length],
+        )
+
+    def _find_record(self, address: Address, signature: str) -> MocketRecord | None:
+        """Get the record stored under a signature, reading it if needed.
+
+        Args:
+            address: (host, port) tuple
+            signature: Request signature
+
+        Returns:
+            Matching MocketRecord or None
+        """
+        record = super()._find_record(address, signature)
+        if record is None and signature in self._index[address]:
+            record = self._read_record(address, self._index[address][signature])
+            self._records[address][signature] = record
+        return record
+
+    def get_records(self, address: Address) -> list[MocketRecord]:
+        """Get all records for an address.
+
+        Args:
+            address: (host, port) tuple
+
+        Returns:
+            List of MocketRecord instances
+        """
+        for signature in self._index[address]:
+            self._find_record(address, signature)
+        return super().get_records(address)
+
+    def _save_record(self, signature: str, record: MocketRecord) -> None:
+        """Buffer a new record, to be written to the binary file.
+
+        Args:
+            signature: Request signature
+            record: MocketRecord instance
+        """
+        self._pending.append(((record.host, record.port), signature, record))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records and the updated index."""
+        if not self._pending:
+            return
+
+        with _lock(self._directory):
+            self._write_pending()
+        self._pending = []
+
+    def _write_pending(self) -> None:
+        """Append the buffered records to the binary file, holding the lock.
+
+        Records written meanwhile by other processes are kept.
+        """
+        self.close()
+        exists = False
+        if self.binary_file.exists():
+            # the file may have grown since it was loaded
+            self._open()
+            exists = self._mmap is not None
+            self._read_index()
+            self.close()
+
+        # a new file is written aside and moved in place at once
+        path = self.binary_file
+        if not exists:
+            path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+        with path.open("r+b" if exists else "w+b") as f:
+            if exists:
+                f.seek(0, os.SEEK_END)
+            else:
+                f.write(self.HEADER.pack(self.MAGIC, 0))
+            for address, signature, record in self._pending:
+                request = encode_to_bytes(record.request)
+                response = encode_to_bytes(record.response)
+                request_offset = f.tell()
+                f.write(request)
+                response_offset = f.tell()
+                f.write(response)
+                self._index[address][signature] = [
+                    request_offset,
+                    len(request),
+                    response_offset,
+                    len(response),
+                ]
+
+            index: dict[str, dict[str, dict[str, list[int]]]] = defaultdict(dict)
+            for (host, port), signature_offsets in self._index.items():
+                if signature_offsets:
+                    index[host][str(port)] = signature_offsets
+
+            self._index_offset = f.tell()
+            f.write(json.dumps(index, sort_keys=True).encode())
+            # the header is only updated once the index is written
+            f.flush()
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, self._index_offset))
+
+        if not exists:
+            os.replace(path, self.binary_file)
+        self._open()
+
+
+RECORD_STORAGES: dict[str, type[MocketRecordStorage]] = {
+    "json": MocketRecordStorage,
+    "jsonl": MocketJsonLinesRecordStorage,
+    "binary": MocketBinaryRecordStorage,
+}
+
+
+def get_record_storage_cls(
+    recording_format: str | None = None,
+) -> type[MocketRecordStorage]:
+    """Get the record storage class for a recording format.
+
+    Args:
+        recording_format: Name of the format, defaults to the value of the
+            MOCKET_RECORDING_FORMAT env var or "json"
+
+    Returns:
+        Record storage class
+
+    Raises:
+        ValueError: If the format is unknown
+
+    >>> get_record_storage_cls("jsonl").__name__
+    'MocketJsonLinesRecordStorage'
+    """
+    recording_format = recording_format or os.getenv("MOCKET_RECORDING_FORMAT", "json")
+    try:
+        return RECORD_STORAGES[recording_format]
+    except KeyError:
+        raise ValueError(
+            f"Unknown recording format {recording_format!r}, "
+            f"choose one of: {', '.join(RECORD_STORAGES)}"
+        ) from None
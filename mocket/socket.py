@@ -131,6 +131,10 @@ def mock_socketpair(
 class MocketSocket:
     """Mock socket implementation for Mocket."""
 
+    # seconds waited for the rest of a response known to be incomplete,
+    # when the socket has no timeout of its own
+    incomplete_response_timeout: float = 10.0
+
     def __init__(
         self,
         family: socket.AddressFamily | int = socket.AF_INET,
@@ -153,7 +157,10 @@ class MocketSocket:
         self._proto = proto
 
         self._kwargs = kwargs
-        self._true_socket = true_socket(family, type, proto)
+        # the real socket is only created when something actually needs it,
+        # fully mocked traffic never consumes a file descriptor
+        self._true_socket: socket.socket | None = None
+        self._true_socket_options: list[tuple[Any, ...]] = []
 
         self._buflen = 65536
         self._timeout: float | None = None
@@ -213,8 +220,12 @@ class MocketSocket:
         address = (self._host, self._port)
         r_fd, _ = Mocket.get_pair(address)
         if not r_fd:
+            # only used for signalling readiness, data stays in self.io
             r_fd, w_fd = os.pipe()
+            os.set_blocking(r_fd, False)
+            os.set_blocking(w_fd, False)
             Mocket.set_pair(address, (r_fd, w_fd))
+            self.io.signal_readiness()
         return r_fd
 
     def gettimeout(self) -> float | None:
@@ -240,11 +251,16 @@ class MocketSocket:
             value: Option value as an integer or bytes, or None when optlen is provided
             optlen: Option length (used when value is None)
         """
+        args = (
+            (level, optname, value)
+            if optlen is None
+            else (level, optname, value, optlen)
+        )
         if self._true_socket:
-            if optlen is not None:
-                self._true_socket.setsockopt(level, optname, value, optlen)
-            else:
-                self._true_socket.setsockopt(level, optname, value)
+            self._true_socket.setsockopt(*args)
+        else:
+            # applied as soon as the real socket gets created
+            self._true_socket_options.append(args)
 
     def settimeout(self, timeout: float | None) -> None:
         """Set the socket timeout.
@@ -308,6 +324,9 @@ class MocketSocket:
         """
         self._address = self._host, self._port = address
         Mocket._address = address
+        if self._io is not None:
+            self._io.address = address
+            self._io.signal_readiness()
 
     def makefile(self, mode: str = "r", bufsize: int = -1) -> MocketSocketIO:
         """Create a file object for the socket.
@@ -368,17 +387,15 @@ class MocketSocket:
         if entry is None:
             entry = self.get_entry(data)
 
+        response: tuple[bytes, ...] | None = None
         if entry:
-            consume_response = entry.collect(data)
-            response = entry.get_response() if consume_response is not False else None
+            if entry.collect(data) is not False:
+                response = entry.get_response_segments()
         else:
-            response = self.true_sendall(data, *args, **kwargs)
+            response = (self.true_sendall(data, *args, **kwargs),)
 
         if response is not None:
-            self.io.seek(0)
-            self.io.write(response)
-            self.io.truncate()
-            self.io.seek(0)
+            self.io.feed(*response)
 
     def sendmsg(
         self,
@@ -457,6 +474,8 @@ class MocketSocket:
             data = self.recv(len(buffers[0]))
         except BlockingIOError:
             return 0
+        if not data:
+            return 0
 
         for i, buffer in enumerate(buffers):
             if i < len(data):
@@ -502,13 +521,16 @@ class MocketSocket:
         if hasattr(buffer, "write"):
             return buffer.write(self.recv(buffersize))
 
-        if buffersize is None:
-            buffersize = len(buffer)
+        view = memoryview(buffer).cast("B")
+        if buffersize is not None:
+            view = view[:buffersize]
 
-        data = self.recv(buffersize)
-        if data:
-            buffer[: len(data)] = data
-        return len(data)
+        read = self.io.readinto(view)
+        if not read:
+            data = self._recv_signal(len(view))
+            read = len(data)
+            view[:read] = data
+        return read
 
     def recvfrom(
         self, buffersize: int, flags: int | None = None
@@ -537,17 +559,70 @@ class MocketSocket:
         Raises:
             BlockingIOError: If socket is non-blocking and no data available
         """
-        r_fd, _ = Mocket.get_pair((self._host, self._port))
-        if r_fd:
-            return os.read(r_fd, buffersize)
-        data = self.io.read(buffersize)
-        if data:
-            return data
+        return self.io.read(buffersize) or self._recv_signal(buffersize)
+
+    def _recv_signal(self, buffersize: int) -> bytes:
+        """Receive what is left when the buffer of the socket is empty.
+
+        When asyncio wraps this socket in an SSL object (see `wrap_bio`),
+        the data is buffered by the latter and reading the readiness signal
+        from this socket is what makes asyncio read from the SSL object.
+        The pipe is left alone otherwise, as the signal could belong to
+        another socket for the same address.
+
+        Args:
+            buffersize: Maximum number of bytes to receive
+
+        Returns:
+            Signal bytes, or no bytes at all if the socket is blocking
+
+        Raises:
+            BlockingIOError: If the socket is non-blocking and there is no signal
+        """
+        address = (self._host, self._port)
+        r_fd, _ = Mocket.get_pair(address)
+        if r_fd and address in Mocket._bio_addresses:
+            with contextlib.suppress(BlockingIOError):
+                data = os.read(r_fd, buffersize)
+                if data:
+                    return data
+        if self.getblocking():
+            return b""
+        raise self._would_block()
+
+    @staticmethod
+    def _would_block() -> BlockingIOError:
+        """Get the error raised when there is no data to receive.
+
+        Returns:
+            BlockingIOError instance
+        """
         # used by Redis mock
         exc = BlockingIOError()
         exc.errno = errno.EWOULDBLOCK
         exc.args = (0,)
-        raise exc
+        return exc
+
+    def _new_true_socket(self) -> socket.socket:
+        """Create the real socket backing this one.
+
+        Returns:
+            A new real socket with the pending options applied
+        """
+        _true_socket = true_socket(self._family, self._type, self._proto)
+        for args in self._true_socket_options:
+            _true_socket.setsockopt(*args)
+        return _true_socket
+
+    def _get_true_socket(self) -> socket.socket:
+        """Get the real socket, creating it on first use.
+
+        Returns:
+            The real socket
+        """
+        if self._true_socket is None:
+            self._true_socket = self._new_true_socket()
+        return self._true_socket
 
     def true_sendall(self, data: bytes, *args: Any, **kwargs: Any) -> bytes:
         """Send data through the real socket and receive response.
@@ -578,21 +653,35 @@ class MocketSocket:
         host, port = self._address
         host = true_gethostbyname(host)
 
+        _true_socket = self._get_true_socket()
+
         with contextlib.suppress(OSError, ValueError):
             # already connected
-            self._true_socket.connect((host, port))
+            _true_socket.connect((host, port))
 
-        self._true_socket.sendall(data, *args, **kwargs)
-        response = b""
+        _true_socket.sendall(data, *args, **kwargs)
+        response = bytearray()
+        complete = None
         # https://github.com/kennethreitz/requests/blob/master/tests/testserver/server.py#L12
-        while True:
-            more_to_read = select.select([self._true_socket], [], [], 0.1)[0]
+        while not complete:
+            # wait for the rest of a response known to be incomplete,
+            # otherwise consider it over when the connection goes silent
+            if complete is False:
+                timeout = self._timeout or self.incomplete_response_timeout
+            else:
+                timeout = 0.1
+            # SSL sockets may already hold decrypted data
+            more_to_read = (
+                hasattr(_true_socket, "pending") and _true_socket.pending()
+            ) or select.select([_true_socket], [], [], timeout)[0]
             if not more_to_read and response:
                 break
-            new_content = self._true_socket.recv(self._buflen)
+            new_content = _true_socket.recv(self._buflen)
             if not new_content:
                 break
             response += new_content
+            complete = Mocket.is_response_complete(data, response)
+        response = bytes(response)
 
         # store request+response in recordings
         if Mocket._record_storage:
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
+from mocket.mocket import Mocket
 from mocket.socket import MocketSocket
 from mocket.ssl.socket import MocketSSLSocket
 
@@ -112,6 +113,9 @@ class MocketSSLContext(_MocketSSLContext):
         """
         ssl_obj = MocketSSLSocket()
         ssl_obj._host = server_hostname
+        if Mocket._address[0]:
+            # the socket connected last is the one the BIOs are fed from
+            Mocket._bio_addresses.add(Mocket._address)
         return ssl_obj
 
 
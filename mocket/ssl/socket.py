@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import socket
 import ssl
 from datetime import datetime, timedelta
 from ssl import Options
@@ -28,6 +29,8 @@ class MocketSSLSocket(MocketSocket):
         self._did_handshake: bool = False
         self._sent_non_empty_bytes: bool = False
         self._original_socket: MocketSocket = self
+        self._ssl_context: ssl.SSLContext | None = None
+        self._server_hostname: str | None = None
 
     def read(self, buffersize: int | None = None) -> bytes:
         """Read data from the SSL socket.
@@ -107,6 +110,24 @@ class MocketSSLSocket(MocketSocket):
         """
         return ssl.OP_NO_COMPRESSION
 
+    def _new_true_socket(self) -> socket.socket:
+        """Create the real socket, wrapping the original one when needed.
+
+        Returns:
+            The real socket, SSL-wrapped if an SSL context was given
+        """
+        if self._original_socket is not self:
+            _true_socket = self._original_socket._get_true_socket()
+        else:
+            _true_socket = super()._new_true_socket()
+
+        if self._ssl_context:
+            _true_socket = self._ssl_context.wrap_socket(
+                sock=_true_socket,
+                server_hostname=self._server_hostname,
+            )
+        return _true_socket
+
     def unwrap(self) -> MocketSocket:
         """Unwrap the SSL socket and return the underlying socket.
 
@@ -138,13 +159,9 @@ class MocketSSLSocket(MocketSocket):
         """
         ssl_socket = MocketSSLSocket()
         ssl_socket._original_socket = sock
-        ssl_socket._true_socket = sock._true_socket
-
-        if ssl_context:
-            ssl_socket._true_socket = ssl_context.wrap_socket(
-                sock=ssl_socket._true_socket,
-                server_hostname=server_hostname,
-            )
+        # the real (wrapped) socket gets created lazily, see `_new_true_socket`
+        ssl_socket._ssl_context = ssl_context
+        ssl_socket._server_hostname = server_hostname
 
         ssl_socket._kwargs = kwargs
 
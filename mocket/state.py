@@ -0,0 +1,111 @@
+"""Mocket state, scoped to the current context."""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import threading
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Iterator, MutableSequence
+
+from mocket.framing import http_response_framing
+
+if TYPE_CHECKING:
+    from mocket.entry import MocketEntry
+    from mocket.index import MocketEntryIndex
+    from mocket.journal import RequestJournal
+    from mocket.recording import MocketRecordStorage
+    from mocket.types import Address, ResponseFraming
+
+
+class MocketState:
+    """Entries, requests and settings of Mocket.
+
+    The process-wide state is used unless `isolated_state` gives the current
+    context (thread or asyncio task) its own.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty state."""
+        # asyncio_transport flag of each Mocket.enable() call not disabled yet
+        self.enablings: list[bool] = []
+        self.socket_pairs: dict[Address, tuple[int, int]] = {}
+        # addresses whose data asyncio reads through an SSL object of wrap_bio
+        self.bio_addresses: set[Address | tuple[None, None]] = set()
+        self.address: Address | tuple[None, None] = (None, None)
+        self.entries: dict[Address, list[MocketEntry]] = collections.defaultdict(list)
+        self.entries_index: dict[Address, MocketEntryIndex] = {}
+        self.requests: MutableSequence[Any] = []
+        self.request_journal: RequestJournal | None = None
+        self.record_storage: MocketRecordStorage | None = None
+        self.response_framings: list[ResponseFraming] = [http_response_framing]
+        self.last_entry: MocketEntry | None = None
+        # for each active scope, the entries served within it along with
+        # their response_index and _served before, to be rewound
+        self.scoped_entries: list[dict[int, tuple[MocketEntry, int, bool | None]]] = []
+        self.strict: bool | None = None
+        self.strict_allowed: list | None = None
+        # results memoized by the entries for the last request data, kept
+        # per thread as the process-wide state is shared among them
+        self.memo = threading.local()
+
+
+_process_state = MocketState()
+_current_state: ContextVar[MocketState | None] = ContextVar(
+    "mocket_state", default=None
+)
+_enabled_lock = threading.Lock()
+
+
+def get_state() -> MocketState:
+    """Get the state of the current context.
+
+    Returns:
+        MocketState instance
+    """
+    return _current_state.get() or _process_state
+
+
+@contextlib.contextmanager
+def isolated_state() -> Iterator[MocketState]:
+    """Give the current context its own empty state.
+
+    asyncio tasks created within the block inherit it, threads see the
+    process-wide state unless they are run in a copy of the current context.
+
+    Yields:
+        New MocketState instance
+    """
+    state = MocketState()
+    token = _current_state.set(state)
+    try:
+        yield state
+    finally:
+        _current_state.reset(token)
+
+
+def push_enabling(state: MocketState, asyncio_transport: bool) -> None:
+    """Count a Mocket.enable() call on a state.
+
+    Args:
+        state: MocketState instance
+        asyncio_transport: Whether it patches asyncio as well
+    """
+    with _enabled_lock:
+        state.enablings.append(asyncio_transport)
+
+
+def pop_enabling(state: MocketState) -> tuple[bool | None, bool]:
+    """Count a Mocket.disable() call on a state.
+
+    Args:
+        state: MocketState instance
+
+    Returns:
+        asyncio_transport flag of the enabling it matches (None if the state
+        was not enabled) and whether it was the last one, so that the
+        state has to be reset
+    """
+    with _enabled_lock:
+        asyncio_transport = state.enablings.pop() if state.enablings else None
+        return asyncio_transport, not state.enablings
@@ -0,0 +1,262 @@
+"""Native asyncio transport for mocked connections."""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+from typing import Any, Callable
+
+from mocket.compat import decode_from_bytes
+from mocket.exceptions import MocketException
+from mocket.mocket import Mocket
+from mocket.socket import MocketSocket
+from mocket.types import Address
+
+true_create_connection = asyncio.BaseEventLoop.create_connection
+
+
+class MocketTransport(asyncio.Transport):
+    """Transport serving mocked responses to an asyncio protocol.
+
+    Data written goes through `MocketSocket.sendall` (entry matching,
+    request collection) and responses are handed to the protocol from the
+    event loop, without any file descriptor involved. Data not matching
+    any entry closes the transport with a MocketException, as reaching the
+    real server would block the loop.
+    """
+
+    max_size: int = 256 * 1024
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.BaseProtocol,
+        sock: MocketSocket,
+        extra: dict[str, Any] | None = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            loop: Event loop
+            protocol: Protocol receiving the responses
+            sock: Connected socket the requests are sent through
+            extra: Extra information about the transport
+        """
+        super().__init__(extra)
+        self._loop = loop
+        self._protocol = protocol
+        self._sock = sock
+        self._closing = False
+        self._paused = False
+
+        self._extra.setdefault("socket", sock)
+        self._extra.setdefault("peername", sock._address)
+        self._extra.setdefault("sockname", ("127.0.0.1", 0))
+
+    def get_protocol(self) -> asyncio.BaseProtocol:
+        """Get the protocol."""
+        return self._protocol
+
+    def set_protocol(self, protocol: asyncio.BaseProtocol) -> None:  # type: ignore[override]
+        """Set a new protocol.
+
+        Args:
+            protocol: Protocol receiving the responses
+        """
+        self._protocol = protocol
+
+    def is_closing(self) -> bool:
+        """Tell if the transport is closing or closed."""
+        return self._closing
+
+    def is_reading(self) -> bool:
+        """Tell if the transport is receiving."""
+        return not (self._paused or self._closing)
+
+    def pause_reading(self) -> None:
+        """Pause delivering responses to the protocol."""
+        self._paused = True
+
+    def resume_reading(self) -> None:
+        """Resume delivering responses to the protocol."""
+        if self._paused:
+            self._paused = False
+            self._loop.call_soon(self._deliver)
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        """Send data, scheduling the delivery of the response.
+
+        Args:
+            data: Data to send
+        """
+        if self._closing or not data:
+            return
+        data = bytes(data)
+        entry = self._sock.get_entry(data)
+        if entry is None:
+            self._fatal_error(
+                MocketException(
+                    f"No entry matching the data sent to {self._sock._address}, "
+                    "MocketTransport does not reach the real server"
+                )
+            )
+            return
+        try:
+            self._sock.sendall(data, entry=entry)
+        except Exception as exc:
+            self._fatal_error(exc)
+            return
+        self._loop.call_soon(self._deliver)
+
+    def writelines(self, list_of_data: Any) -> None:
+        """Send several chunks of data at once.
+
+        Args:
+            list_of_data: Iterable of chunks
+        """
+        self.write(b"".join(list_of_data))
+
+    def can_write_eof(self) -> bool:
+        """Tell that the write end can be closed alone."""
+        return True
+
+    def write_eof(self) -> None:
+        """Close the write end, there is nothing to flush."""
+
+    def get_write_buffer_size(self) -> int:
+        """Get the write buffer size, data is always sent at once."""
+        return 0
+
+    def get_write_buffer_limits(self) -> tuple[int, int]:
+        """Get the write buffer limits."""
+        return 0, 0
+
+    def set_write_buffer_limits(
+        self, high: int | None = None, low: int | None = None
+    ) -> None:
+        """Set the write buffer limits, unused."""
+
+    def close(self) -> None:
+        """Close the transport."""
+        self._close(None)
+
+    def abort(self) -> None:
+        """Close the transport immediately."""
+        self._close(None)
+
+    def _fatal_error(self, exc: BaseException) -> None:
+        """Close the transport because of an error.
+
+        Args:
+            exc: Error to be reported to the protocol
+        """
+        self._close(exc)
+
+    def _close(self, exc: BaseException | None) -> None:
+        """Close the transport, telling the protocol.
+
+        Args:
+            exc: Error causing the closure, if any
+        """
+        if self._closing:
+            return
+        self._closing = True
+        self._sock.close()
+        self._loop.call_soon(self._protocol.connection_lost, exc)
+
+    def _deliver(self) -> None:
+        """Hand the pending response data to the protocol."""
+        while self.is_reading():
+            if isinstance(self._protocol, asyncio.BufferedProtocol):
+                buffer = self._protocol.get_buffer(self.max_size)
+                size = self._sock.io.readinto(buffer)
+                if not size:
+                    return
+                self._protocol.buffer_updated(size)
+            else:
+                data = self._sock.io.read(self.max_size)
+                if not data:
+                    return
+                self._protocol.data_received(data)  # type: ignore[attr-defined]
+
+
+def _get_mocked_address(
+    host: str | bytes | None, port: int | None, sock: Any
+) -> Address | None:
+    """Get the address of a connection to be mocked by MocketTransport.
+
+    Args:
+        host: Hostname
+        port: Port number
+        sock: Already connected socket, if any
+
+    Returns:
+        Address with entries registered, None otherwise
+    """
+    if sock is not None:
+        if not isinstance(sock, MocketSocket):
+            return None
+        address = sock._address
+    else:
+        if isinstance(host, bytes):
+            host = decode_from_bytes(host)
+        address = (host, port)
+    if not Mocket._entries.get(address):  # type: ignore[call-overload]
+        return None
+    return address  # type: ignore[return-value]
+
+
+async def mock_create_connection(
+    self: asyncio.BaseEventLoop,
+    protocol_factory: Callable[[], asyncio.BaseProtocol],
+    host: str | None = None,
+    port: int | None = None,
+    *,
+    ssl: Any = None,
+    sock: Any = None,
+    server_hostname: str | None = None,
+    **kwargs: Any,
+) -> tuple[asyncio.Transport, asyncio.BaseProtocol]:
+    """Mock loop.create_connection, using MocketTransport for mocked addresses.
+
+    Connections to addresses without registered entries are made as usual,
+    through MocketSocket.
+
+    Args:
+        protocol_factory: Callable returning a protocol
+        host: Hostname
+        port: Port number
+        ssl: SSL context or flag, TLS is not emulated by MocketTransport
+        sock: Already connected socket
+        server_hostname: Hostname to check the certificate against
+        **kwargs: Additional arguments
+
+    Returns:
+        Tuple of (transport, protocol)
+    """
+    address = _get_mocked_address(host, port, sock)
+    if address is None:
+        return await true_create_connection(  # type: ignore[no-any-return]
+            self,
+            protocol_factory,
+            host,
+            port,
+            ssl=ssl,
+            sock=sock,
+            server_hostname=server_hostname,
+            **kwargs,
+        )
+
+    if sock is None:
+        sock = MocketSocket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect(address)
+
+    extra = {}
+    if ssl:
+        extra["sslcontext"] = ssl if not isinstance(ssl, bool) else None
+        extra["ssl_object"] = None
+
+    protocol = protocol_factory()
+    transport = MocketTransport(self, protocol, sock, extra=extra)
+    protocol.connection_made(transport)
+    return transport, protocol
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 from typing_extensions import Buffer, TypeAlias
 
 Address = Tuple[str, int]
 
+# (request, response received so far) -> complete, incomplete or unknown
+ResponseFraming: TypeAlias = Callable[[bytes, bytes], Optional[bool]]
+
+# request -> request to hash for the recordings
+RequestCanonicalizer: TypeAlias = Callable[[bytes], bytes]
+
 # adapted from typeshed/stdlib/_typeshed/__init__.pyi
 WriteableBuffer: TypeAlias = Buffer
 ReadableBuffer: TypeAlias = Buffer
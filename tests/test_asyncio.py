@@ -5,11 +5,14 @@ import socket
 import tempfile
 
 import aiohttp
+import httpx
 import pytest
 
-from mocket import Mocketizer, async_mocketize
+from mocket import Mocket, MocketEntry, Mocketizer, async_mocketize
+from mocket.exceptions import MocketException
 from mocket.mockhttp import Entry
 from mocket.plugins.aiohttp_connector import MocketTCPConnector
+from mocket.transport import MocketTransport
 
 
 def test_asyncio_record_replay():
@@ -67,3 +70,83 @@ async def test_aiohttp():
     ) as session, session.get(url) as response:
         response = await response.json()
         assert response == data
+
+
+@pytest.mark.asyncio
+@async_mocketize(asyncio_transport=True)
+async def test_asyncio_transport_open_connection():
+    Mocket.register(MocketEntry(("example.com", 6379), [b"+PONG\r\n"]))
+
+    reader, writer = await asyncio.open_connection("example.com", 6379)
+    assert isinstance(writer.transport, MocketTransport)
+
+    writer.write(b"PING\r\n")
+    await writer.drain()
+    assert await reader.readline() == b"+PONG\r\n"
+    writer.close()
+
+    assert Mocket.last_request() == b"PING\r\n"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["http://bar.foo/", "https://bar.foo/"])
+@async_mocketize(asyncio_transport=True)
+async def test_asyncio_transport_aiohttp(url):
+    Entry.single_register(
+        Entry.GET,
+        url,
+        body=json.dumps({"message": "Hello"}),
+        headers={"content-type": "application/json"},
+    )
+
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=3), connector=MocketTCPConnector()
+    ) as session:
+        responses = await asyncio.gather(*(session.get(url) for _ in range(100)))
+        for response in responses:
+            assert await response.json() == {"message": "Hello"}
+
+    assert len(Mocket.request_list()) == 100
+
+
+@pytest.mark.asyncio
+@async_mocketize(asyncio_transport=True)
+async def test_asyncio_transport_without_matching_entry():
+    class PingEntry(MocketEntry):
+        @staticmethod
+        def can_handle(data):
+            return data == b"PING\r\n"
+
+    Mocket.register(PingEntry(("example.com", 6379), [b"+PONG\r\n"]))
+
+    reader, writer = await asyncio.open_connection("example.com", 6379)
+    writer.write(b"QUIT\r\n")
+
+    with pytest.raises(MocketException):
+        await reader.readline()
+    assert writer.transport.is_closing()
+    assert not Mocket.has_requests()
+
+
+@pytest.mark.asyncio
+@async_mocketize(asyncio_transport=True)
+async def test_asyncio_transport_without_entries_uses_sockets():
+    Entry.single_register(Entry.GET, "http://bar.foo/")
+
+    _, writer = await asyncio.open_connection("foo.bar", 80)
+
+    assert not isinstance(writer.transport, MocketTransport)
+    writer.close()
+
+
+@pytest.mark.asyncio
+@async_mocketize(asyncio_transport=True)
+async def test_asyncio_transport_httpx():
+    url = "http://httpbin.local/ip"
+    Entry.single_register(Entry.GET, url, body="asd", status=404)
+
+    async with httpx.AsyncClient() as client:
+        responses = await asyncio.gather(*(client.get(url) for _ in range(200)))
+
+    assert {(r.status_code, r.text) for r in responses} == {(404, "asd")}
+    assert len(Mocket.request_list()) == 200
@@ -1,5 +1,26 @@
-from mocket.compat import do_the_magic
+from mocket import compat
+from mocket.compat import MAGIC_SAMPLE_SIZE, do_the_magic
 
 
 def test_unknown_binary():
     assert do_the_magic(b"foobar-binary") == "application/octet-stream"
+
+
+def test_magic_is_memoized(monkeypatch):
+    body = b"\x89PNG\r\n\x1a\n" + b"\0" * 1024 * 1024
+    assert do_the_magic(body) == "image/png"
+
+    monkeypatch.setattr(compat.puremagic, "magic_string", None)
+    assert do_the_magic(body) == "image/png"
+
+
+def test_magic_sniffs_a_bounded_sample(monkeypatch):
+    sniffed = []
+
+    def magic_string(body):
+        sniffed.append(len(body))
+        return []
+
+    monkeypatch.setattr(compat.puremagic, "magic_string", magic_string)
+    assert do_the_magic(b"\1" * 10 * MAGIC_SAMPLE_SIZE) == "application/octet-stream"
+    assert sniffed == [2 * MAGIC_SAMPLE_SIZE]
@@ -1,7 +1,9 @@
+import io
 import json
 import os
 import socket
 import tempfile
+import threading
 import time
 from unittest import TestCase, mock
 from urllib.error import HTTPError
@@ -12,7 +14,13 @@ import pytest
 import requests
 
 from mocket import Mocket, Mocketizer, mocketize
-from mocket.mocks.mockhttp import Entry, Response
+from mocket.mocks.mockhttp import (
+    Entry,
+    ParsedRequest,
+    Request,
+    Response,
+    StreamingResponse,
+)
 
 
 class HttpTestCase(TestCase):
@@ -482,3 +490,208 @@ class HttpEntryTestCase(HttpTestCase):
         response = requests.get("http://testme.org/foobar?b=2")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"message": "Missed!"})
+
+    @mocketize
+    def test_entry_overriding_can_handle_is_not_indexed(self):
+        class PrefixEntry(Entry):
+            def _can_handle(self, path, qs_dict):
+                return path.startswith(self.path)
+
+        Mocket.register(PrefixEntry("http://testme.org/api", Entry.GET, ["api"]))
+
+        response = requests.get("http://testme.org/api/users")
+        self.assertEqual(response.text, "api")
+
+    @mocketize
+    def test_get_entry_with_many_entries(self):
+        for i in range(1000):
+            Entry.single_register(Entry.GET, f"http://testme.org/{i}", body=str(i))
+        Entry.single_register(Entry.POST, "http://testme.org/500", body="post")
+        Entry.single_register(Entry.GET, "http://testme.org/500", body="shadowed")
+
+        entry = Mocket.get_entry(
+            "testme.org", 80, b"GET /500 HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+        )
+        self.assertEqual(entry.responses[0].body, b"500")
+        entry = Mocket.get_entry(
+            "testme.org", 80, b"POST /500 HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+        )
+        self.assertEqual(entry.responses[0].body, b"post")
+        self.assertIsNone(
+            Mocket.get_entry(
+                "testme.org", 80, b"GET /500?a=1 HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+            )
+        )
+
+    @mocketize
+    def test_can_handle_request(self):
+        class HeaderEntry(Entry):
+            def can_handle_request(self, request):
+                head = request.data[request.headers_start : request.headers_end]
+                return request.method == self.method and b"X-Mocket: 1" in head
+
+        Mocket.register(
+            HeaderEntry("http://testme.org/", Entry.GET, Response(body="header")),
+        )
+        Entry.single_register(Entry.GET, "http://testme.org/foo", body="foo")
+
+        self.assertEqual(requests.get("http://testme.org/foo").text, "foo")
+        response = requests.get("http://testme.org/bar", headers={"X-Mocket": "1"})
+        self.assertEqual(response.text, "header")
+
+    def test_parsed_request_is_shared(self):
+        data = b"POST /foo?a=1 HTTP/1.1\r\nHost: testme.org\r\n\r\nbody"
+        request = ParsedRequest.parse(data)
+        self.assertIs(ParsedRequest.parse(data), request)
+        self.assertEqual(request.target, "/foo?a=1")
+        self.assertEqual(request.query, {"a": ["1"]})
+        self.assertEqual(data[request.headers_end + 4 :], b"body")
+
+        Mocket.reset()
+        self.assertFalse(hasattr(Mocket._memo, "parsed_request"))
+
+    def test_body_chunks_are_not_memoized(self):
+        head = b"POST / HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+        request = ParsedRequest.parse(head)
+
+        self.assertIsNone(ParsedRequest.parse(b"x" * 1024))
+        self.assertIs(Mocket._memo.parsed_request[0], head)
+        self.assertIs(ParsedRequest.parse(head), request)
+
+    def test_parsed_request_is_memoized_per_thread(self):
+        data = b"GET / HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+        request = ParsedRequest.parse(data)
+
+        parsed = []
+        thread = threading.Thread(target=lambda: parsed.append(Mocket._memo.__dict__))
+        thread.start()
+        thread.join()
+        self.assertEqual(parsed, [{}])
+        self.assertIs(ParsedRequest.parse(data), request)
+
+    @mocketize
+    def test_request_body_sent_in_chunks(self):
+        Entry.single_register(Entry.POST, "http://testme.org/upload", body="ok")
+        chunks = [b"x" * 1024] * 100
+
+        with socket.create_connection(("testme.org", 80)) as sock:
+            sock.sendall(
+                b"POST /upload HTTP/1.1\r\nHost: testme.org\r\n"
+                b"Content-Length: 102400\r\n\r\n"
+            )
+            for chunk in chunks:
+                sock.sendall(chunk)
+            self.assertTrue(sock.recv(4096).endswith(b"\r\n\r\nok"))
+
+        self.assertEqual(len(Mocket.request_list()), 1)
+        self.assertEqual(Mocket.last_request().body, "x" * 102400)
+
+    def test_request_is_parsed_lazily(self):
+        request = Request(b"POST /foo?a=1 HTTP/1.1\r\nHost: testme.org\r\n")
+        request.add_data(b"Content-Length: 4\r\n\r\nbo")
+        self.assertFalse(hasattr(request, "__dict__"))
+
+        self.assertEqual((request.method, request.path), ("POST", "/foo?a=1"))
+        self.assertEqual(request.querystring, {"a": ["1"]})
+        self.assertIsNone(request._parser)
+
+        request.add_data(b"dy")
+        self.assertEqual(request.headers, {"host": "testme.org", "content-length": "4"})
+        self.assertEqual(request.body, "body")
+
+    def test_identical_responses_share_protocol_data(self):
+        with mock.patch("time.gmtime", return_value=time.gmtime(1e9)):
+            first = Response(body="foo", headers={"X-Foo": "1"})
+            second = Response(body="foo", headers={"X-Foo": "1"})
+            other = Response(body="foo", headers={"X-Foo": "2"})
+
+        self.assertIs(first.segments[0], second.segments[0])
+        self.assertIsNot(first.segments[0], other.segments[0])
+        self.assertIn(b"Date: Sun, 09 Sep 2001 01:46:40 GMT\r\n", first.data)
+
+    def test_response_headers_set_later_are_sent(self):
+        response = Response(body="foo")
+        self.assertNotIn(b"X-foo", response.data)
+
+        response.set_extra_headers({"x-foo": "1"})
+        self.assertIn(b"X-foo: 1\r\n", response.data)
+
+    @mocketize
+    def test_response_data_can_be_set(self):
+        response = Response(body="foo")
+        response.data = b"HTTP/1.1 204 No Content\r\n\r\n"
+        Entry.register(Entry.GET, "http://testme.org/", response)
+
+        self.assertEqual(requests.get("http://testme.org/").status_code, 204)
+        self.assertEqual(response.data, b"HTTP/1.1 204 No Content\r\n\r\n")
+
+    def test_response_with_live_date(self):
+        with mock.patch("time.gmtime", return_value=time.gmtime(1e9)):
+            response = Response(body="foo")
+        response.live_date = True
+
+        with mock.patch("time.gmtime", return_value=time.gmtime(1e9)):
+            protocol_data = response.segments[0]
+            self.assertIs(response.segments[0], protocol_data)
+        with mock.patch("time.gmtime", return_value=time.gmtime(1e9 + 61)):
+            self.assertIn(b"Date: Sun, 09 Sep 2001 01:47:41 GMT\r\n", response.data)
+        self.assertTrue(response.data.endswith(b"\r\n\r\nfoo"))
+
+    def test_file_object_content_type_is_not_sniffed(self):
+        png = b"\x89PNG\r\n\x1a\n" + b"\0" * 16
+
+        class NoSniffResponse(Response):
+            sniff_content_type = False
+
+        with mock.patch("mocket.mocks.mockhttp.do_the_magic") as do_the_magic:
+            given = Response(io.BytesIO(png), headers={"content-type": "image/x"})
+            not_sniffed = NoSniffResponse(io.BytesIO(png))
+        do_the_magic.assert_not_called()
+
+        self.assertEqual(given.headers["Content-Type"], "image/x")
+        self.assertEqual(
+            not_sniffed.headers["Content-Type"], "application/octet-stream"
+        )
+        self.assertEqual(Response(io.BytesIO(png)).headers["Content-Type"], "image/png")
+
+    @mocketize
+    def test_streaming_response_is_chunked(self):
+        produced = []
+
+        def events():
+            for i in range(1000):
+                produced.append(i)
+                yield f"data: {i}\n\n"
+
+        url = "http://testme.org/events"
+        Entry.register(Entry.GET, url, StreamingResponse(events()))
+        response = requests.get(url, stream=True)
+
+        self.assertEqual(response.headers["Transfer-Encoding"], "chunked")
+        self.assertNotIn("Content-Length", response.headers)
+        lines = response.iter_lines()
+        self.assertEqual(next(lines), b"data: 0")
+        self.assertLess(len(produced), 10)
+        self.assertEqual([line for line in lines if line][-1], b"data: 999")
+
+    @mocketize
+    def test_streaming_response_with_content_length(self):
+        body = io.BytesIO(b"x" * 100_000)
+        body.seek(10)
+
+        class SmallChunksResponse(StreamingResponse):
+            chunk_size = 1024
+
+        url = "http://testme.org/download"
+        response = SmallChunksResponse(body, headers={"Content-Length": "99990"})
+        Entry.register(Entry.GET, url, response)
+
+        for _ in range(2):
+            # seekable file objects are rewound
+            received = requests.get(url)
+            self.assertEqual(received.headers["Content-Length"], "99990")
+            self.assertEqual(
+                received.headers["Content-Type"], "application/octet-stream"
+            )
+            self.assertNotIn("Transfer-Encoding", received.headers)
+            self.assertEqual(received.content, b"x" * 99_990)
@@ -1,15 +1,23 @@
+import asyncio
+import hashlib
 import io
 import os
 import socket
+import threading
 from unittest import TestCase
 from unittest.mock import patch
+from urllib.request import urlopen
 
 import httpx
 import psutil
 import pytest
 
-from mocket import Mocket, MocketEntry, Mocketizer, mocketize
+from mocket import Mocket, MocketEntry, Mocketizer, inject, mocketize
 from mocket.compat import encode_to_bytes
+from mocket.journal import RequestJournal, RequestSummary
+from mocket.mockhttp import Entry
+from mocket.mode import MocketMode
+from mocket.socket import MocketSocket
 
 
 class MocketTestCase(TestCase):
@@ -80,6 +88,39 @@ class MocketTestCase(TestCase):
         Mocket.register(entry)
         self.assertEqual(Mocket.get_entry("localhost", 80, True), entry)
 
+    def test_getentry_keeps_registration_order(self):
+        class KeyedEntry(MocketEntry):
+            def __init__(self, location, key, responses):
+                super().__init__(location, responses)
+                self.key = key
+
+            @property
+            def index_key(self):
+                return self.key
+
+            @classmethod
+            def request_index_key(cls, data):
+                return data.split(b" ", 1)[0]
+
+            def can_handle(self, data):
+                return data.startswith(self.key)
+
+        addr = ("localhost", 80)
+        foo = KeyedEntry(addr, b"foo", True)
+        catch_all = MocketEntry(addr, True)
+        Mocket.register(KeyedEntry(addr, b"bar", True), foo, catch_all)
+        self.assertEqual(Mocket.get_entry(*addr, b"foo bar"), foo)
+        self.assertEqual(Mocket.get_entry(*addr, b"foobar"), catch_all)
+
+        # entries added behind Mocket's back still get picked up
+        late_entry = KeyedEntry(addr, b"baz", True)
+        Mocket._entries[addr].insert(0, late_entry)
+        self.assertEqual(Mocket.get_entry(*addr, b"baz"), late_entry)
+
+        replacement = KeyedEntry(addr, b"qux", True)
+        Mocket._entries[addr][0] = replacement
+        self.assertEqual(Mocket.get_entry(*addr, b"qux"), replacement)
+
     def test_getresponse(self):
         entry = MocketEntry(("localhost", 8080), ["Show me.\r\n"])
         self.assertEqual(entry.get_response(), encode_to_bytes("Show me.\r\n"))
@@ -235,3 +276,231 @@ async def test_no_dangling_fds():
         await client.get(url)
 
     assert proc.num_fds() <= prev_num_fds
+
+
+def test_isolated_mocketizers_run_in_parallel():
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def run(i):
+        with Mocketizer(isolated=True, strict_mode=bool(i % 2)):
+            Mocket.register(MocketEntry(("localhost", 80), [f"pong {i}".encode()]))
+            barrier.wait()
+            with socket.socket() as sock:
+                sock.connect(("localhost", 80))
+                sock.sendall(f"ping {i}".encode())
+                barrier.wait()
+                results[i] = (
+                    sock.recv(1024),
+                    Mocket.request_list(),
+                    MocketMode.STRICT,
+                )
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {
+        i: (f"pong {i}".encode(), [f"ping {i}".encode()], bool(i % 2)) for i in range(4)
+    }
+    assert socket.socket is not MocketSocket
+    assert not Mocket.has_requests()
+
+
+def test_isolated_mocketizer_keeps_outer_state():
+    Mocket.register(MocketEntry(("localhost", 80), [b"outer"]))
+    with Mocketizer(isolated=True):
+        assert not Mocket._entries
+    assert Mocket._entries[("localhost", 80)]
+    Mocket.reset()
+
+
+def test_isolated_mocketizer_can_be_entered_again():
+    mocketizer = Mocketizer(isolated=True)
+    for _ in range(2):
+        with mocketizer:
+            assert not Mocket._entries
+            Mocket.register(MocketEntry(("localhost", 80), [b"inner"]))
+    assert not Mocket._entries
+
+
+def test_nested_mocketizers_patch_once():
+    with Mocketizer():
+        table = inject.socket_patches._table
+        with Mocketizer(isolated=True):
+            assert socket.socket is MocketSocket
+        assert socket.socket is MocketSocket
+    assert socket.socket is not MocketSocket
+    assert not inject.socket_patches.applied
+
+    with Mocketizer():
+        assert inject.socket_patches._table is table
+
+
+def test_nested_mocketizer_keeps_outer_one_enabled():
+    with Mocketizer():
+        Mocket.register(MocketEntry(("localhost", 80), [b"outer"]))
+        with Mocketizer():
+            assert socket.socket is MocketSocket
+        assert socket.socket is MocketSocket
+        assert Mocket._entries[("localhost", 80)]
+    assert socket.socket is not MocketSocket
+    assert not Mocket._entries
+
+
+def test_failing_mocketize_setup_disables_mocket():
+    class FailingSetup:
+        def mocketize_setup(self):
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError), Mocketizer(FailingSetup()):
+        pass
+    assert socket.socket is not MocketSocket
+    assert not inject.socket_patches.applied
+
+
+def test_asyncio_patches_are_released_with_their_mocketizer():
+    create_connection = asyncio.BaseEventLoop.create_connection
+    with Mocketizer():
+        with Mocketizer(isolated=True, asyncio_transport=True):
+            assert asyncio.BaseEventLoop.create_connection is not create_connection
+        assert asyncio.BaseEventLoop.create_connection is create_connection
+        assert socket.socket is MocketSocket
+    assert socket.socket is not MocketSocket
+
+
+def test_scope_undoes_the_changes_of_a_test():
+    with Mocketizer() as session:
+        entry = MocketEntry(("localhost", 80), [b"first", b"second"])
+        Mocket.register(entry)
+
+        for _ in range(3):
+            with session.scope():
+                Mocket.register(MocketEntry(("localhost", 8080), [b"scoped"]))
+                with socket.socket() as sock:
+                    sock.connect(("localhost", 80))
+                    sock.sendall(b"ping")
+                    assert sock.recv(1024) == b"first"
+                    sock.sendall(b"ping")
+                    assert sock.recv(1024) == b"second"
+                    sock.fileno()
+                assert Mocket.request_list() == [b"ping", b"ping"]
+
+            assert not entry._served
+            assert entry.response_index == 0
+            assert list(Mocket._entries) == [("localhost", 80)]
+            assert Mocket._socket_pairs == {}
+            assert not Mocket.has_requests()
+            assert socket.socket is MocketSocket
+
+
+def test_served_entries_are_only_tracked_within_scopes():
+    with Mocketizer():
+        Mocket.register(MocketEntry(("localhost", 80), [b"pong"]))
+        with socket.socket() as sock:
+            sock.connect(("localhost", 80))
+            sock.sendall(b"ping")
+            assert sock.recv(1024) == b"pong"
+        assert Mocket._scoped_entries == []
+
+
+def test_scope_rewinds_entries_served_before():
+    with Mocketizer() as session:
+        entry = MocketEntry(("localhost", 80), [b"first", b"second", b"third"])
+        Mocket.register(entry)
+        with socket.socket() as sock:
+            sock.connect(("localhost", 80))
+            sock.sendall(b"ping")
+            assert sock.recv(1024) == b"first"
+
+            with session.scope():
+                sock.sendall(b"ping")
+                assert sock.recv(1024) == b"second"
+
+            assert entry._served
+            assert entry.response_index == 1
+            sock.sendall(b"ping")
+            assert sock.recv(1024) == b"second"
+
+
+def test_scope_copies_entries_on_write():
+    with Mocketizer() as session:
+        Mocket.register(MocketEntry(("localhost", 80), [b"session"]))
+        entries = Mocket._entries[("localhost", 80)]
+
+        @session.scope()
+        def test():
+            assert Mocket._entries.get(("localhost", 80)) is entries
+            Mocket.register(MocketEntry(("localhost", 80), [b"test"]))
+            assert Mocket._entries.get(("localhost", 80)) is not entries
+            assert len(Mocket._entries[("localhost", 80)]) == 2
+
+        test()
+        assert len(entries) == 1
+
+
+def _send_requests(count):
+    Mocket.register(MocketEntry(("localhost", 80), [b"pong"]))
+    with socket.socket() as sock:
+        sock.connect(("localhost", 80))
+        for i in range(count):
+            sock.sendall(f"ping {i}".encode())
+            sock.recv(1024)
+
+
+@mocketize(request_journal=RequestJournal(maxlen=2))
+def test_request_journal_keeps_the_last_requests():
+    _send_requests(5)
+
+    assert Mocket.request_list() == [b"ping 3", b"ping 4"]
+    assert Mocket.last_request() == b"ping 4"
+    Mocket.remove_last_request()
+    assert Mocket.last_request() == b"ping 3"
+
+
+@mocketize(request_journal=RequestJournal(maxlen=0))
+def test_request_journal_keeps_no_requests():
+    _send_requests(5)
+
+    assert Mocket.request_list() == []
+    assert Mocket.last_request() is None
+
+
+def test_request_journal_keeps_summaries():
+    with Mocketizer(request_journal=RequestJournal(summaries=True)):
+        Entry.single_register(Entry.GET, "http://testme.org/foo?bar=1", body="foo")
+        urlopen("http://testme.org/foo?bar=1").read()
+
+        summary = Mocket.last_request()
+        assert isinstance(summary, RequestSummary)
+        assert (summary.method, summary.path) == ("GET", "/foo?bar=1")
+        assert summary.size > 0
+        assert Mocket.request_list() == [summary]
+
+    assert Mocket._request_journal is None
+
+
+def test_request_journal_summarizes_the_whole_body():
+    head = b"POST /foo HTTP/1.1\r\nHost: testme.org\r\nContent-Length: 6\r\n\r\n"
+    with Mocketizer(request_journal=RequestJournal(summaries=True)):
+        Entry.single_register(Entry.POST, "http://testme.org/foo", body="foo")
+        with socket.socket() as sock:
+            sock.connect(("testme.org", 80))
+            sock.sendall(head + b"foo")
+            sock.sendall(b"bar")
+
+        summary = Mocket.last_request()
+        assert (summary.method, summary.path) == ("POST", "/foo")
+        assert summary.size == len(head) + 6
+        assert (
+            summary.digest
+            == hashlib.blake2b(head + b"foobar", digest_size=8).hexdigest()
+        )
+        assert Mocket.request_list() == [summary]
+
+
+def test_request_journal_rejects_negative_maxlen():
+    with pytest.raises(ValueError):
+        RequestJournal(maxlen=-1)
@@ -0,0 +1,286 @@
+import json
+import multiprocessing
+import subprocess
+import sys
+
+import pytest
+
+from mocket import Mocket, recording
+from mocket.__main__ import main
+from mocket.recording import (
+    MocketBinaryRecordStorage,
+    MocketJsonLinesRecordStorage,
+    MocketRecordStorage,
+    RECORD_STORAGES,
+    get_record_storage_cls,
+)
+
+ADDRESS = ("testme.org", 80)
+REQUEST = b"GET /foo HTTP/1.1\r\nHost: testme.org\r\n\r\n"
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\nfoo"
+
+
+def test_json_storage_saves_records_in_batches(tmp_path):
+    storage = MocketRecordStorage(directory=tmp_path, namespace="ns")
+    storage.flush_every = 2
+    for i in range(3):
+        storage.put_record(
+            address=ADDRESS, request=f"GET /{i} HTTP/1.1\r\n\r\n".encode(), response=b""
+        )
+    assert len(json.loads(storage.file.read_text())["testme.org"]["80"]) == 2
+
+    storage.flush()
+    assert len(json.loads(storage.file.read_text())["testme.org"]["80"]) == 3
+
+
+def test_jsonl_storage_appends_records(tmp_path):
+    storage = MocketJsonLinesRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    assert not storage.journal.exists()
+
+    storage.flush()
+    storage.put_record(
+        address=ADDRESS, request=b"GET /bar HTTP/1.1\r\n\r\n", response=b""
+    )
+    storage.flush()
+
+    assert len(storage.journal.read_text().splitlines()) == 2
+    assert not storage.file.exists()
+
+    storage = MocketJsonLinesRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+    assert len(storage.get_records(ADDRESS)) == 2
+
+
+def test_jsonl_storage_flushes_in_batches(tmp_path):
+    storage = MocketJsonLinesRecordStorage(directory=tmp_path, namespace="ns")
+    storage.flush_every = 2
+    for i in range(3):
+        storage.put_record(
+            address=ADDRESS, request=f"GET /{i} HTTP/1.1\r\n\r\n".encode(), response=b""
+        )
+    assert len(storage.journal.read_text().splitlines()) == 2
+
+
+def test_jsonl_storage_is_flushed_on_disable(tmp_path):
+    Mocket.enable(
+        namespace="ns",
+        truesocket_recording_dir=str(tmp_path),
+        recording_format="jsonl",
+    )
+    Mocket._record_storage.put_record(
+        address=ADDRESS, request=REQUEST, response=RESPONSE
+    )
+    Mocket.disable()
+
+    assert (tmp_path / "ns.jsonl").exists()
+
+
+def test_jsonl_storage_is_flushed_at_exit(tmp_path):
+    script = f"""
+from pathlib import Path
+from mocket.recording import MocketJsonLinesRecordStorage
+
+storage = MocketJsonLinesRecordStorage(directory=Path({str(tmp_path)!r}), namespace="ns")
+storage.put_record(address={ADDRESS!r}, request={REQUEST!r}, response={RESPONSE!r})
+assert not storage.journal.exists()
+"""
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    storage = MocketJsonLinesRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+
+
+def test_compact(tmp_path, capsys):
+    storage = MocketJsonLinesRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.flush()
+
+    main(["compact", str(tmp_path)])
+
+    assert capsys.readouterr().out == "compacted ns\n"
+    assert not storage.journal.exists()
+    records = json.loads(storage.file.read_text())
+    assert len(records["testme.org"]["80"]) == 1
+
+    storage = MocketRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+
+
+def test_unknown_recording_format():
+    with pytest.raises(ValueError):
+        get_record_storage_cls("yaml")
+
+
+def test_binary_storage_reads_records_lazily(tmp_path):
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.put_record(
+        address=ADDRESS, request=b"GET /bar HTTP/1.1\r\n\r\n", response=b""
+    )
+    storage.flush()
+    storage.close()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert not storage._records[ADDRESS]
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+    assert len(storage._records[ADDRESS]) == 1
+    assert len(storage.get_records(ADDRESS)) == 2
+    assert storage.get_record(address=("testme.org", 443), request=REQUEST) is None
+    storage.close()
+
+
+def test_binary_storage_appends_records(tmp_path):
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.flush()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(
+        address=("testme.org", 443), request=REQUEST, response=b"HTTP/1.1 204\r\n\r\n"
+    )
+    storage.flush()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+    assert (
+        storage.get_record(address=("testme.org", 443), request=REQUEST).response
+        == b"HTTP/1.1 204\r\n\r\n"
+    )
+
+
+def test_binary_storage_survives_an_interrupted_write(tmp_path):
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.flush()
+    storage.close()
+    # records written after the index, the header was not updated yet
+    with storage.binary_file.open("ab") as f:
+        f.write(b"\xff" * 100)
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+    storage.put_record(address=ADDRESS, request=b"GET /bar\r\n\r\n", response=b"")
+    storage.flush()
+    storage.close()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert len(storage.get_records(ADDRESS)) == 2
+    storage.close()
+
+
+def test_binary_storage_with_an_empty_file(tmp_path):
+    (tmp_path / "ns.bin").touch()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_records(ADDRESS) == []
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.flush()
+    storage.close()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+    storage.close()
+
+
+def test_binary_storage_is_closed_on_reset(tmp_path):
+    Mocket.enable(
+        namespace="ns",
+        truesocket_recording_dir=str(tmp_path),
+        recording_format="binary",
+    )
+    storage = Mocket._record_storage
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    Mocket.disable()
+
+    assert storage._mmap is None
+    assert (tmp_path / "ns.bin").exists()
+
+
+def test_binary_storage_loads_json_recordings(tmp_path):
+    storage = MocketRecordStorage(directory=tmp_path, namespace="ns")
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    storage.flush()
+
+    storage = MocketBinaryRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+
+
+def test_request_signatures_are_computed_once(tmp_path, monkeypatch):
+    calls = []
+    hash_prepare_request = recording._hash_prepare_request
+
+    def _hash_prepare_request(data):
+        calls.append(data)
+        return hash_prepare_request(data)
+
+    monkeypatch.setattr(recording, "_hash_prepare_request", _hash_prepare_request)
+
+    storage = MocketRecordStorage(directory=tmp_path, namespace="ns")
+    assert storage.get_record(address=ADDRESS, request=REQUEST) is None
+    storage.put_record(address=ADDRESS, request=REQUEST, response=RESPONSE)
+    assert storage.get_record(address=ADDRESS, request=REQUEST).response == RESPONSE
+
+    assert calls == [REQUEST]
+    # only a prefix of the requests is kept
+    assert all(len(key[1]) <= 64 for key in storage._signatures)
+
+
+def test_request_canonicalizer(tmp_path):
+    def drop_request_id(request):
+        return b"\r\n".join(
+            line
+            for line in request.split(b"\r\n")
+            if not line.lower().startswith(b"x-request-id:")
+        )
+
+    storage = MocketRecordStorage(
+        directory=tmp_path, namespace="ns", canonicalizer=drop_request_id
+    )
+    storage.put_record(
+        address=ADDRESS,
+        request=b"GET /foo HTTP/1.1\r\nX-Request-Id: 1\r\n\r\n",
+        response=RESPONSE,
+    )
+    storage.flush()
+
+    storage = MocketRecordStorage(
+        directory=tmp_path, namespace="ns", canonicalizer=drop_request_id
+    )
+    record = storage.get_record(
+        address=ADDRESS, request=b"GET /foo HTTP/1.1\r\nX-Request-Id: 2\r\n\r\n"
+    )
+    assert record.response == RESPONSE
+
+
+def _record_in_worker(recording_format, directory, worker):
+    storage_cls = get_record_storage_cls(recording_format)
+    storage = storage_cls(directory=directory, namespace="ns")
+    storage.flush_every = 5
+    for i in range(20):
+        storage.put_record(
+            address=ADDRESS,
+            request=f"GET /{worker}/{i} HTTP/1.1\r\n\r\n".encode(),
+            response=RESPONSE,
+        )
+    storage.flush()
+
+
+@pytest.mark.parametrize("recording_format", sorted(RECORD_STORAGES))
+def test_recording_from_parallel_processes(tmp_path, recording_format):
+    workers = [
+        multiprocessing.Process(
+            target=_record_in_worker, args=(recording_format, tmp_path, worker)
+        )
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    storage = get_record_storage_cls(recording_format)(
+        directory=tmp_path, namespace="ns"
+    )
+    assert len(storage.get_records(ADDRESS)) == 80
@@ -1,11 +1,12 @@
 import contextlib
+import time
 from unittest import TestCase
 
 import pytest
 import redis
 
 from mocket import Mocket, mocketize
-from mocket.mockredis import ERROR, OK, Entry, Redisizer
+from mocket.mockredis import ERROR, OK, QUEUED, Entry, Redisizer, StatefulEntry
 
 
 class RedisizerTestCase(TestCase):
@@ -23,6 +24,24 @@ class RedisizerTestCase(TestCase):
             Redisizer.error("ERR: ☃ summer"), b"-ERR: \xe2\x98\x83 summer\r\n"
         )
 
+    def test_encode(self):
+        self.assertEqual(
+            Redisizer.encode([b"\xff", 1, None, [OK], {"a": 1.5}, True]),
+            b"*6\r\n$1\r\n\xff\r\n:1\r\n$-1\r\n*1\r\n+OK\r\n"
+            b"*2\r\n$1\r\na\r\n$3\r\n1.5\r\n:1\r\n",
+        )
+
+    def test_encode_resp3(self):
+        self.assertEqual(
+            Redisizer.encode([None, {"a": 1.0}, {b"b"}, False, 2**64], resp3=True),
+            b"*5\r\n_\r\n%1\r\n$1\r\na\r\n,1\r\n~1\r\n$1\r\nb\r\n"
+            b"#f\r\n(18446744073709551616\r\n",
+        )
+
+    def test_encode_unknown_type(self):
+        with self.assertRaises(TypeError):
+            Redisizer.encode([object()])
+
     def test_redisize_int(self):
         self.assertEqual(Redisizer.redisize(10), b":10\r\n")
 
@@ -261,3 +280,267 @@ class RedisTestCase(TestCase):
         self.assertRaises(
             redis.exceptions.ConnectionError, self.rclient.incr, "counter", "one"
         )
+
+
+def _register_handshake():
+    Entry.register_response("CLIENT SETINFO LIB-NAME redis-py", OK)
+    Entry.register_response(f"CLIENT SETINFO LIB-VER {redis.__version__}", OK)
+
+
+@mocketize(strict_mode=True)
+def test_pipeline():
+    _register_handshake()
+    for i in range(100):
+        Entry.register_response(f"SET key{i} {i}", OK)
+        Entry.register_response(f"GET key{i}", str(i))
+
+    pipeline = redis.StrictRedis(protocol=2).pipeline(transaction=False)
+    for i in range(100):
+        pipeline.set(f"key{i}", i)
+        pipeline.get(f"key{i}")
+
+    assert pipeline.execute() == [
+        response for i in range(100) for response in (True, str(i).encode())
+    ]
+    assert len(Mocket.request_list()) == 2 + 200
+    assert Mocket.last_request().data == b"*2\r\n$3\r\nGET\r\n$5\r\nkey99\r\n"
+
+
+@mocketize(strict_mode=True)
+def test_transaction():
+    _register_handshake()
+    Entry.register_response("MULTI", OK)
+    Entry.register_response("SET mocket awesome", QUEUED)
+    Entry.register_response("EXEC", ["OK"])
+
+    pipeline = redis.StrictRedis(protocol=2).pipeline()
+    pipeline.set("mocket", "awesome")
+
+    assert pipeline.execute() == [True]
+    commands = [request.data.split(b"\r\n")[2] for request in Mocket.request_list()]
+    assert commands[2:] == [b"MULTI", b"SET", b"EXEC"]
+
+
+def test_pipeline_with_unknown_command():
+    Entry.register_response("GET foo", "bar")
+    entry = Mocket._entries[("localhost", 6379)][0]
+    data = b"*2\r\n$3\r\nGET\r\n$3\r\nfoo\r\n*2\r\n$3\r\nGET\r\n$3\r\nbaz\r\n"
+
+    assert not entry.can_handle(data)
+    Mocket.reset()
+
+
+def test_entries_are_indexed_by_command(monkeypatch):
+    class CatchAllEntry(Entry):
+        def can_handle(self, data):
+            return True
+
+    for i in range(1000):
+        Entry.register_response(f"GET key{i}", str(i))
+    Mocket.register(CatchAllEntry(None, "GET any", [Redisizer.redisize("any")]))
+
+    calls = []
+    can_handle = Entry.can_handle
+    monkeypatch.setattr(
+        Entry,
+        "can_handle",
+        lambda self, data: calls.append(self) or can_handle(self, data),
+    )
+
+    data = b"*2\r\n$3\r\nGET\r\n$6\r\nkey999\r\n"
+    entry = Mocket.get_entry("localhost", 6379, data)
+    assert entry.command == Redisizer.tokens(["GET", "key999"])
+    assert len(calls) == 1
+
+    data = b"*2\r\n$3\r\nGET\r\n$7\r\nmissing\r\n"
+    assert isinstance(Mocket.get_entry("localhost", 6379, data), CatchAllEntry)
+    Mocket.reset()
+
+
+@mocketize(strict_mode=True)
+def test_stateful_entry():
+    StatefulEntry.register()
+    client = redis.StrictRedis(protocol=2)
+
+    assert client.set("counter", 1)
+    assert client.incrby("counter", 2) == 3
+    assert client.hset("user:1", mapping={"name": "mocket", "stars": "1k"}) == 2
+    assert client.hgetall("user:1") == {b"name": b"mocket", b"stars": b"1k"}
+    assert client.rpush("queue", "a", "b", "c") == 3
+    assert client.lpop("queue") == b"a"
+    assert client.lrange("queue", 0, -1) == [b"b", b"c"]
+    assert client.zadd("ranking", {"a": 2, "b": 1.5}) == 2
+    assert client.zrange("ranking", 0, -1, withscores=True) == [(b"b", 1.5), (b"a", 2)]
+    assert sorted(client.scan_iter("user:*", count=1)) == [b"user:1"]
+
+    with pytest.raises(redis.ResponseError, match="WRONGTYPE"):
+        client.get("queue")
+
+    pipeline = client.pipeline()
+    pipeline.incr("counter").get("counter")
+    assert pipeline.execute() == [4, b"4"]
+    assert client.dbsize() == 4
+
+
+@mocketize(strict_mode=True)
+def test_stateful_entry_expires_keys():
+    entry = StatefulEntry.register()
+    client = redis.StrictRedis(protocol=2)
+
+    assert client.set("session", "abc", px=10)
+    assert client.set("user", "mocket", ex=100)
+    assert 0 < client.pttl("session") <= 10
+    assert client.ttl("user") == 100
+    time.sleep(0.02)
+
+    assert client.get("session") is None
+    assert client.ttl("session") == -2
+    assert client.keys("*") == [b"user"]
+    assert entry.db.data == {b"user": b"mocket"}
+
+
+def test_stateful_entry_replies():
+    entry = StatefulEntry()
+    arity_error = b"-ERR wrong number of arguments for 'get' command\r\n"
+
+    assert entry.execute("GET") == arity_error
+    assert entry.execute("GET", "a", "b") == arity_error
+    assert entry.execute("INCRBY", "counter", " 1_0 ").startswith(b"-ERR value")
+    assert entry.execute("LPOP", "missing") == b"$-1\r\n"
+    assert entry.execute("LPOP", "missing", "2") == b"*-1\r\n"
+    entry.execute("HSET", "hash", "field", "value")
+    assert entry.execute("HINCRBY", "hash", "field", "1") == (
+        b"-ERR hash value is not an integer\r\n"
+    )
+
+    entry.execute("HELLO", "3")
+    entry.execute("SADD", "set", "a")
+    entry.execute("HSET", "hash", "field", "1")
+    assert entry.execute("SISMEMBER", "set", "a") == b":1\r\n"
+    assert entry.execute("HEXISTS", "hash", "missing") == b":0\r\n"
+    assert entry.execute("SETNX", "key", "value") == b":1\r\n"
+    assert entry.execute("PERSIST", "key") == b":0\r\n"
+    assert entry.execute("LPOP", "missing", "2") == b"_\r\n"
+
+
+def test_stateful_entry_expire_options():
+    entry = StatefulEntry()
+    entry.execute("SET", "key", "value")
+
+    assert entry.execute("EXPIRE", "key", "100", "XX") == b":0\r\n"
+    assert entry.execute("EXPIRE", "key", "100", "GT") == b":0\r\n"
+    assert entry.execute("EXPIRE", "key", "100", "NX") == b":1\r\n"
+    assert entry.execute("EXPIRE", "key", "200", "NX") == b":0\r\n"
+    assert entry.execute("EXPIRE", "key", "200", "LT") == b":0\r\n"
+    assert entry.execute("EXPIRE", "key", "200", "GT") == b":1\r\n"
+    assert entry.execute("TTL", "key") == b":200\r\n"
+    assert entry.execute("EXPIRE", "key", "50", "XX", "LT") == b":1\r\n"
+    assert entry.execute("EXPIRE", "key", "1", "NX", "GT").startswith(b"-ERR NX")
+    assert entry.execute("EXPIRE", "key", "1", "FOO").startswith(b"-ERR Unsupported")
+
+
+def test_stateful_entry_score_ranges():
+    entry = StatefulEntry()
+    float_error = b"-ERR min or max is not a float\r\n"
+
+    assert entry.execute("ZRANGEBYSCORE", "ranking", "a", "1") == float_error
+    entry.execute("ZADD", "ranking", "1", "a", "2", "b", "2", "c", "3", "d")
+    assert entry.execute("ZRANGEBYSCORE", "ranking", "(1", "x") == float_error
+    assert entry.execute("ZRANGEBYSCORE", "ranking", "(1", "2") == (
+        b"*2\r\n$1\r\nb\r\n$1\r\nc\r\n"
+    )
+    assert entry.execute("ZRANGE", "ranking", "(2", "-inf", "BYSCORE", "REV") == (
+        b"*1\r\n$1\r\na\r\n"
+    )
+    assert entry.execute(
+        "ZRANGEBYSCORE", "ranking", "-inf", "+inf", "LIMIT", "1", "2"
+    ) == (b"*2\r\n$1\r\nb\r\n$1\r\nc\r\n")
+    assert entry.execute("ZRANGEBYSCORE", "ranking", "3", "(3") == b"*0\r\n"
+    assert entry.execute("ZRANGE", "ranking", "0", "-1", "LIMIT", "0", "1") == (
+        b"-ERR syntax error, LIMIT is only supported in combination with either "
+        b"BYSCORE or BYLEX\r\n"
+    )
+
+
+def test_stateful_entry_aborts_transactions_with_rejected_commands():
+    entry = StatefulEntry()
+
+    assert entry.execute("MULTI") == b"+OK\r\n"
+    assert entry.execute("SET", "key", "value") == b"+QUEUED\r\n"
+    assert entry.execute("NOPE").startswith(b"-ERR unknown command")
+    assert entry.execute("EXEC") == (
+        b"-EXECABORT Transaction discarded because of previous errors.\r\n"
+    )
+    assert entry.execute("GET", "key") == b"$-1\r\n"
+
+    entry.execute("MULTI")
+    assert entry.execute("GET").startswith(b"-ERR wrong number of arguments")
+    assert entry.execute("EXEC").startswith(b"-EXECABORT")
+
+    entry.execute("MULTI")
+    entry.execute("INCR", "key")
+    assert entry.execute("EXEC") == b"*1\r\n:1\r\n"
+
+
+def test_stateful_entry_interleaved_scans():
+    entry = StatefulEntry()
+    for key in "abcd":
+        entry.execute("SET", key, "1")
+
+    first = entry.execute("SCAN", "0", "COUNT", "2")
+    second = entry.execute("SCAN", "0", "COUNT", "3")
+    first_cursor = first.split(b"\r\n")[2]
+    second_cursor = second.split(b"\r\n")[2]
+    assert first_cursor != second_cursor
+
+    assert entry.execute("SCAN", first_cursor, "COUNT", "2") == (
+        b"*2\r\n$1\r\n0\r\n*2\r\n$1\r\nc\r\n$1\r\nd\r\n"
+    )
+    assert entry.execute("SCAN", second_cursor, "COUNT", "3") == (
+        b"*2\r\n$1\r\n0\r\n*1\r\n$1\r\nd\r\n"
+    )
+
+
+@mocketize(strict_mode=True)
+def test_stateful_entry_after_entries():
+    Entry.register_response("GET mocket", "canned")
+    entry = StatefulEntry.register()
+    entry.execute("SET", "mocket", "stored")
+    client = redis.StrictRedis(protocol=2)
+
+    assert client.get("mocket") == b"canned"
+    assert client.getdel("mocket") == b"stored"
+
+
+@mocketize(strict_mode=True)
+def test_stateful_entry_pipeline_after_entries():
+    Entry.register_response("GET mocket", "canned")
+    StatefulEntry.register()
+    pipeline = redis.StrictRedis(protocol=2).pipeline(transaction=False)
+    pipeline.set("mocket", "stored").get("mocket").getdel("mocket").get("mocket")
+
+    assert pipeline.execute() == [True, b"canned", b"stored", b"canned"]
+
+
+def test_pipeline_memo_is_cleared_on_reset():
+    Entry.register_response("GET foo", "bar")
+    Entry.register_response("GET baz", "qux")
+    entry = Mocket._entries[("localhost", 6379)][0]
+    data = b"*2\r\n$3\r\nGET\r\n$3\r\nfoo\r\n*2\r\n$3\r\nGET\r\n$3\r\nbaz\r\n"
+
+    assert entry.can_handle(data)
+    Mocket.reset()
+    assert not hasattr(Mocket._memo, "redis_pipeline")
+
+
+@mocketize(strict_mode=True)
+def test_stateful_entry_with_resp3():
+    entry = StatefulEntry.register()
+    client = redis.StrictRedis(protocol=3)
+
+    assert client.hset("user:1", "name", "mocket") == 1
+    assert client.hgetall("user:1") == {b"name": b"mocket"}
+    assert client.zadd("ranking", {"a": 2, "b": 1.5}) == 2
+    assert client.zscore("ranking", "b") == 1.5
+    assert client.zrange("ranking", 0, -1, withscores=True) == [[b"b", 1.5], [b"a", 2]]
+    assert entry.protocol == 3
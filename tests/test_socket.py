@@ -1,11 +1,17 @@
+import select
+import selectors
 import socket
 import struct
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
 
-from mocket import Mocket, MocketEntry, mocketize
-from mocket.socket import MocketSocket
+from mocket import Mocket, MocketEntry, Mocketizer, mocketize
+from mocket.io import MocketSocketIO
+from mocket.mockhttp import Entry
+from mocket.socket import MocketSocket, true_socket
 
 
 @pytest.mark.parametrize("blocking", (False, True))
@@ -122,7 +128,7 @@ def test_getsockopt():
 def test_recvfrom_into():
     sock = MocketSocket(socket.AF_INET, socket.SOCK_STREAM)
     test_data = b"abc123"
-    sock._io = type("MockIO", (), {"read": lambda self, n: test_data})()
+    sock.io.feed(test_data)
     buf = bytearray(10)
     nbytes, addr = sock.recvfrom_into(buf)
     assert nbytes == len(test_data)
@@ -143,7 +149,224 @@ def test_setsockopt_with_optlen():
     sock = MocketSocket(socket.AF_INET, socket.SOCK_STREAM)
     sock._true_socket = MagicMock()
     linger_value = struct.pack("ii", 1, 5)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, linger_value, len(linger_value))
+    sock.setsockopt(
+        socket.SOL_SOCKET, socket.SO_LINGER, linger_value, len(linger_value)
+    )
     sock._true_socket.setsockopt.assert_called_once_with(
         socket.SOL_SOCKET, socket.SO_LINGER, linger_value, len(linger_value)
     )
+
+
+def test_true_socket_is_created_lazily():
+    sock = MocketSocket(socket.AF_INET, socket.SOCK_STREAM)
+    assert sock._true_socket is None
+
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    assert sock._true_socket is None
+
+    with sock._get_true_socket() as true_sock:
+        assert sock._true_socket is true_sock
+        assert true_sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR)
+
+
+@mocketize
+def test_mocked_traffic_does_not_create_true_socket():
+    addr = ("localhost", 8080)
+    Mocket.register(MocketEntry(addr, [b"pong"]))
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.connect(addr)
+    sock.sendall(b"ping")
+
+    assert sock.recv(4) == b"pong"
+    assert sock._true_socket is None
+
+
+@pytest.fixture
+def slow_server():
+    server = true_socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    done = threading.Event()
+    chunks = []
+
+    def serve():
+        # `server.accept()` would build a MocketSocket while Mocket is enabled
+        fd, _ = server._accept()
+        with true_socket(fileno=fd) as conn:
+            conn.recv(1024)
+            for chunk in chunks:
+                conn.sendall(chunk)
+                time.sleep(0.3)
+            # keep the connection open until the client is done
+            done.wait(5)
+
+    thread = threading.Thread(target=serve)
+    yield server.getsockname(), chunks, thread.start
+    done.set()
+    thread.join()
+    server.close()
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    (
+        [b"HTTP/1.1 200 OK\r\nContent-Length: 6\r\n\r\nfoo", b"bar"],
+        [
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nfoo\r\n",
+            b"3\r\nbar\r\n0\r\n\r\n",
+        ],
+    ),
+)
+def test_true_sendall_reads_a_complete_http_response(slow_server, chunks):
+    address, server_chunks, start = slow_server
+    server_chunks.extend(chunks)
+    start()
+
+    with Mocketizer(), socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        assert sock.recv(4096) == b"".join(chunks)
+
+
+def test_true_sendall_gives_up_on_an_incomplete_response(slow_server, monkeypatch):
+    address, server_chunks, start = slow_server
+    server_chunks.append(b"HTTP/1.1 200 OK\r\nContent-Length: 6\r\n\r\nfoo")
+    start()
+    monkeypatch.setattr(MocketSocket, "incomplete_response_timeout", 0.5)
+
+    with Mocketizer(), socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        assert sock.gettimeout() is None
+        sock.connect(address)
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        assert sock.recv(4096) == b"".join(server_chunks)
+
+
+def test_true_sendall_with_response_framing(slow_server):
+    address, server_chunks, start = slow_server
+    server_chunks.extend([b"+PO", b"NG\r\n"])
+    start()
+
+    with Mocketizer(), socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        Mocket.register_response_framing(
+            lambda request, response: response.endswith(b"\r\n")
+        )
+        sock.connect(address)
+        sock.sendall(b"PING\r\n")
+        assert sock.recv(4096) == b"+PONG\r\n"
+
+
+def test_socket_io_reads_segments():
+    sock_io = MocketSocketIO(("localhost", 80))
+    body = b"x" * 10
+    sock_io.feed(b"HTTP/1.1 200 OK\r\n", b"Content-Length: 10\r\n\r\n", body)
+
+    assert sock_io.readline() == b"HTTP/1.1 200 OK\r\n"
+    assert sock_io.readline(5) == b"Conte"
+    assert sock_io.readline() == b"nt-Length: 10\r\n"
+    assert sock_io.read(2) == b"\r\n"
+    # whole segments are returned as they are
+    assert sock_io.read() is body
+    assert sock_io.read() == b""
+
+
+def test_socket_io_readinto():
+    sock_io = MocketSocketIO(("localhost", 80))
+    sock_io.feed(b"foo", b"bar")
+    buffer = bytearray(4)
+
+    assert sock_io.readinto(buffer) == 4
+    assert buffer == b"foob"
+    assert sock_io.readinto(buffer) == 2
+    assert buffer[:2] == b"ar"
+
+
+def test_socket_io_reads_iterators_lazily():
+    sock_io = MocketSocketIO(("localhost", 80))
+    produced = []
+
+    def chunks():
+        for chunk in (b"foo\n", b"", bytearray(b"bar"), b"baz\n"):
+            produced.append(chunk)
+            yield chunk
+
+    sock_io.feed(b"head\n", chunks(), b"tail")
+
+    assert sock_io.readline() == b"head\n"
+    assert produced == []
+    assert sock_io.read(2) == b"fo"
+    assert len(produced) == 1
+    assert sock_io.readline() == b"o\n"
+    assert sock_io.readline() == b"barbaz\n"
+    assert sock_io.read() == b"tail"
+    assert sock_io.read() == b""
+
+
+def test_recv_into_large_response():
+    body = b"x" * (1024 * 1024)
+    with Mocketizer():
+        Entry.single_register(Entry.GET, "http://testme.org/", body=body)
+        with socket.socket() as sock:
+            sock.connect(("testme.org", 80))
+            sock.sendall(b"GET / HTTP/1.1\r\nHost: testme.org\r\n\r\n")
+            received = bytearray()
+            buffer = bytearray(65536)
+            read = sock.recv_into(buffer)
+            while read:
+                received += buffer[:read]
+                read = sock.recv_into(buffer)
+
+    assert received.endswith(b"\r\n\r\n" + body)
+
+
+def test_selectors_with_large_response():
+    body = b"x" * (1024 * 1024)
+    with Mocketizer():
+        Entry.single_register(Entry.GET, "http://testme.org/", body=body)
+        with socket.socket() as sock, selectors.DefaultSelector() as selector:
+            sock.connect(("testme.org", 80))
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+            assert not selector.select(timeout=0)
+
+            sock.sendall(b"GET / HTTP/1.1\r\nHost: testme.org\r\n\r\n")
+            received = b""
+            while selector.select(timeout=1):
+                received += sock.recv(65536)
+
+            assert received.endswith(b"\r\n\r\n" + body)
+            with pytest.raises(BlockingIOError):
+                sock.recv(65536)
+
+
+def test_fileno_after_sendall_is_readable():
+    with Mocketizer():
+        Mocket.register(MocketEntry(("localhost", 1234), [b"pong"]))
+        with socket.socket() as sock:
+            sock.connect(("localhost", 1234))
+            sock.sendall(b"ping")
+
+            assert select.select([sock.fileno()], [], [], 0)[0]
+            assert sock.recv(4) == b"pong"
+            assert not select.select([sock.fileno()], [], [], 0)[0]
+
+
+@pytest.mark.parametrize("blocking", (False, True))
+def test_recv_leaves_the_signal_of_other_sockets(blocking):
+    with Mocketizer():
+        Mocket.register(MocketEntry(("localhost", 1234), [b"pong"]))
+        with socket.socket() as sock, socket.socket() as other:
+            sock.connect(("localhost", 1234))
+            other.connect(("localhost", 1234))
+            other.setblocking(blocking)
+            sock.sendall(b"ping")
+            assert select.select([sock.fileno()], [], [], 0)[0]
+
+            if blocking:
+                assert other.recv(4) == b""
+            else:
+                with pytest.raises(BlockingIOError):
+                    other.recv(4)
+            assert select.select([sock.fileno()], [], [], 0)[0]
+            assert sock.recv(4) == b"pong"